@@ -0,0 +1,105 @@
+import os
+import threading
+
+import numpy as np
+import pygame
+
+SAMPLE_RATE = 44100
+# Bump when a recipe changes so stale cached buffers are not reused
+SYNTH_VERSION = 1
+MUSIC_VOLUME = 0.3
+
+
+def _tone(freqs, duration, amplitude):
+    t = np.linspace(0, duration, int(SAMPLE_RATE * duration))
+    wave = sum(np.sin(2 * np.pi * f * t) for f in freqs)
+    return (wave * amplitude).astype(np.int16)
+
+
+RECIPES = {
+    "click": lambda: _tone((1000,), 0.1, 32767),
+    "catch": lambda: _tone((800, 1000), 0.2, 32767 / 2),
+    "music": lambda: _tone((220, 247, 262, 294), 2.0, 16383 / 4),
+}
+
+
+def default_cache_dir():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "catch-the-thief")
+
+
+def load_buffer(name, cache_dir=None):
+    """Samples for a named sound, read from the disk cache or synthesized and written there."""
+    if cache_dir is None:
+        return RECIPES[name]()
+    path = os.path.join(cache_dir, f"{name}-v{SYNTH_VERSION}-{SAMPLE_RATE}.npy")
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        pass
+    samples = RECIPES[name]()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # Write then rename so a half-written file is never loaded
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, samples)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return samples
+
+
+class Sounds:
+    """Sound effects and music that load after the first frame instead of before it.
+
+    start() opens the mixer and reads (or synthesizes and caches) the sample
+    buffers on a background thread; pump(), called once per frame on the main
+    thread, turns finished buffers into pygame sounds and starts the music.
+    Until then play() is silently a no-op, as it is when audio is disabled or
+    the mixer fails to open.
+    """
+
+    def __init__(self, cache_dir=None, enabled=True, telemetry=None):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+        self.telemetry = telemetry
+        self.sounds = {}
+        self.buffers = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if not self.enabled or self.thread is not None:
+            return
+        try:
+            pygame.mixer.init()
+        except pygame.error as e:
+            self.enabled = False
+            if self.telemetry:
+                self.telemetry.warning("sound_init_failed", error=e)
+            return
+        self.thread = threading.Thread(target=self._load, name="audio", daemon=True)
+        self.thread.start()
+
+    def _load(self):
+        for name in RECIPES:
+            samples = load_buffer(name, self.cache_dir)
+            with self.lock:
+                self.buffers[name] = samples
+
+    def pump(self):
+        if not self.buffers:
+            return
+        with self.lock:
+            ready, self.buffers = self.buffers, {}
+        for name, samples in ready.items():
+            sound = self.sounds[name] = pygame.mixer.Sound(buffer=samples.tobytes())
+            if name == "music":
+                sound.set_volume(MUSIC_VOLUME)
+                sound.play(-1)
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.play()
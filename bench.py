@@ -0,0 +1,297 @@
+"""Benchmarks for the hot paths: pathfinding, grid generation, AI, particles and drawing.
+
+    python bench.py                                  # default sizes, densities and seeds
+    python bench.py --sizes 20 200 2000 --only bfs_path a_star
+    python bench.py --out results.json --save-baseline bench_baseline.json
+    python bench.py --baseline bench_baseline.json --threshold 0.25
+
+Every case is keyed by name and parameters, timed as the median of several
+repeats (each repeat running enough loops to take at least --min-time), and
+written as JSON. With --baseline the run fails (exit status 1) if any case's
+best repeat is slower than the baseline's by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("CATCH_THIEF_LOG", "off")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import numpy as np
+
+from crowd import CrowdState, crowd_step
+from particles import ParticlePool
+from pickups import place_pickups
+from simulation import (DEFAULT_PICKUPS, MOVE_INTERVAL, SimState, bfs_police_path, decide_thief_move, generate_valid_grid,
+                        pursue, step)
+from pathfinding import bfs_path
+
+DEFAULT_SIZES = (20, 100, 500, 2000)
+DEFAULT_DENSITIES = (0.1, 0.3)
+DEFAULT_SEEDS = (1, 2, 3)
+# Drawing is one window regardless of grid size; past 600 cells a cell is under a pixel
+RENDER_MAX_SIZE = 600
+# Regressions are judged on the fastest repeat, which is far less noisy than the median on shared machines
+METRIC = "min_ms"
+# Item-dense maps for the pickup case: 5% of road cells hold an item, and taken items come back after 2 s
+DENSE_PICKUPS = {"boost": 0.01, "time": 0.01, "bonus": 0.03}
+
+
+def make_state(size, density, seed, pickups=DEFAULT_PICKUPS):
+    state = SimState(seed=seed, grid_size=size)
+    grid, valid = generate_valid_grid(state.rng, size, density)
+    state.set_grid(grid, valid, place_pickups(grid, state.rng, pickups))
+    state.thief_pos = (size - 1, size - 1)
+    return state
+
+
+def case_bfs_path(size, density, seed):
+    state = make_state(size, density, seed)
+    grid, target = state.grid, state.thief_pos
+    return lambda: bfs_path((0, 0), target, grid)
+
+
+def case_bfs_police_path(size, density, seed):
+    state = make_state(size, density, seed)
+    planner, target = state.planner, state.thief_pos
+    return lambda: bfs_police_path(planner, (0, 0), target)
+
+
+def case_a_star(size, density, seed):
+    state = make_state(size, density, seed)
+    planner, target = state.planner, state.thief_pos
+    return lambda: planner.a_star((0, 0), target)
+
+
+def case_jps(size, density, seed):
+    state = make_state(size, density, seed)
+    planner, target = state.planner, state.thief_pos
+    return lambda: planner.jps((0, 0), target)
+
+
+def case_hpa(size, density, seed):
+    # Warm cluster tables: the per-query cost once the chase has touched the clusters
+    state = make_state(size, density, seed)
+    clusters, target = state.clusters, state.thief_pos
+    return lambda: clusters.path((0, 0), target)
+
+
+def case_pursuit(size, density, seed):
+    # One chase move: thief steps, field is repaired, police follows the gradient
+    state = make_state(size, density, seed)
+    rng = random.Random(seed)
+
+    def run():
+        neighbors = state.planner.neighbors(state.thief_pos)
+        if neighbors:
+            state.thief_pos = rng.choice(neighbors)
+        path = pursue(state)
+        if len(path) > 2:
+            state.police_pos = path[1]
+    return run
+
+
+def case_generate_valid_grid(size, density, seed):
+    rng = random.Random(seed)
+    return lambda: generate_valid_grid(rng, size, density)
+
+
+def case_decide_thief_move(size, density, seed):
+    state = make_state(size, density, seed)
+    state.difficulty = "Hard"
+    return lambda: decide_thief_move(state)
+
+
+def case_expert_thief(size, density, seed):
+    # Fixed node budget so the case measures search speed rather than the clock
+    state = make_state(size, density, seed)
+    state.expert.node_budget = 2000
+
+    def run():
+        state.expert.clear()
+        state.expert.choose(state.thief_pos, state.police_pos)
+    return run
+
+
+def case_step_pickups(size, density, seed):
+    # One move tick of a whole chase on an item-dense map with respawns, restarted when it ends
+    def fresh():
+        state = make_state(size, density, seed, DENSE_PICKUPS)
+        state.difficulty = "Hard"
+        state.pickup_respawn = 2.0
+        return state
+    state = [fresh()]
+
+    def run():
+        if state[0].outcome:
+            state[0] = fresh()
+        step(state[0], None, MOVE_INTERVAL)
+    return run
+
+
+def case_crowd_step(size, density, seed):
+    # 100 police and 100 thieves; the chase restarts once every thief is caught
+    state = [CrowdState(100, 100, size, density, seed)]
+
+    def run():
+        if not len(state[0].thieves):
+            state[0] = CrowdState(100, 100, size, density, seed)
+        crowd_step(state[0])
+    return run
+
+
+def case_update_particles(size, density, seed):
+    pool = ParticlePool(size * 50, seed=seed)
+
+    def run():
+        if pool.count < pool.capacity // 2:
+            pool.emit(300, 300, (255, 0, 127), pool.capacity - pool.count)
+        pool.update(1 / 60)
+    return run
+
+
+def _game_at(size, density, seed):
+    import game
+    if not hasattr(game, "screen"):
+        game.setup()
+    game.GRID_SIZE = size
+    game.CELL_SIZE = max(1, game.WIDTH // size)
+    game.police_sprite = game.create_sprite(game.NEON_BLUE, game.WHITE, game.CELL_SIZE)
+    game.thief_sprite = game.create_sprite(game.NEON_RED, game.WHITE, game.CELL_SIZE)
+    game.sim = make_state(size, density, seed)
+    game.sim.police_path = bfs_police_path(game.sim.planner, game.sim.police_pos, game.sim.thief_pos)
+    game.prev_police_pos, game.prev_thief_pos = game.sim.police_pos, game.sim.thief_pos
+    game.grid_layer = None
+    game.draw_grid()
+    return game
+
+
+def case_draw_grid(size, density, seed):
+    if size > RENDER_MAX_SIZE:
+        return None
+    game = _game_at(size, density, seed)
+    return game.draw_grid
+
+
+def case_draw_entities(size, density, seed):
+    if size > RENDER_MAX_SIZE:
+        return None
+    game = _game_at(size, density, seed)
+    game.particles.clear()
+    game.add_particles(300, 300, game.NEON_PINK, 200)
+    return lambda: game.draw_entities(game.sim.police_path)
+
+
+CASES = {
+    "bfs_path": case_bfs_path,
+    "bfs_police_path": case_bfs_police_path,
+    "a_star": case_a_star,
+    "jps": case_jps,
+    "hpa": case_hpa,
+    "pursuit": case_pursuit,
+    "generate_valid_grid": case_generate_valid_grid,
+    "decide_thief_move": case_decide_thief_move,
+    "expert_thief": case_expert_thief,
+    "step_pickups": case_step_pickups,
+    "crowd_step": case_crowd_step,
+    "update_particles": case_update_particles,
+    "draw_grid": case_draw_grid,
+    "draw_entities": case_draw_entities,
+}
+
+
+def measure(fn, min_time=0.05, repeat=5):
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1 << 20:
+            break
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    samples = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        samples.append((time.perf_counter() - start) / loops)
+    return {"median_ms": statistics.median(samples) * 1000, "min_ms": min(samples) * 1000, "loops": loops, "repeat": repeat}
+
+
+def run(names, sizes, densities, seeds, min_time, repeat):
+    results = {}
+    for name in names:
+        for size in sizes:
+            for density in densities:
+                for seed in seeds:
+                    fn = CASES[name](size, density, seed)
+                    if fn is None:
+                        continue
+                    key = f"{name}[size={size},density={density},seed={seed}]"
+                    results[key] = dict(measure(fn, min_time, repeat), name=name, size=size, density=density, seed=seed)
+                    print(f"{key:<60} {results[key]['median_ms']:10.4f} ms", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, result in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        ratio = result[METRIC] / old[METRIC] if old[METRIC] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append((key, old[METRIC], result[METRIC], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(CASES), default=list(CASES))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--densities", nargs="+", type=float, default=DEFAULT_DENSITIES)
+    parser.add_argument("--seeds", nargs="+", type=int, default=DEFAULT_SEEDS)
+    parser.add_argument("--min-time", type=float, default=0.05, help="seconds per repeat (default 0.05)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown vs baseline (default 0.2 = 20%%)")
+    parser.add_argument("--save-baseline", help="also write the results as a new baseline")
+    args = parser.parse_args(argv)
+
+    results = run(args.only, args.sizes, args.densities, args.seeds, args.min_time, args.repeat)
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for key, old, new, ratio in regressions:
+            print(f"REGRESSION {key}: {old:.4f} ms -> {new:.4f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""Many police units against many thieves on one map, headless.
+
+    python crowd.py                                   # 200 police, 200 thieves, 500x500
+    python crowd.py --police 400 --thieves 300 --size 300 --ticks 1000 --seed 3
+
+Each side plans from one shared distance field per tick instead of one
+search per agent: thieves read a multi-source BFS from every police unit,
+police read one from every thief. Prints tick timings and captures.
+"""
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from pathfinding import multi_source_bfs
+from simulation import OBSTACLE_DENSITY, generate_valid_grid
+
+# Thieves only react to police this close; past it every cell looks equally safe
+THIEF_HORIZON = 32
+FAR = 1 << 30
+
+
+def _resolve(current, desired):
+    # Undo moves until no two units of one side share a cell; units staying put keep their cell
+    target = desired.copy()
+    index = np.arange(len(target))
+    while len(target) > 1:
+        order = np.lexsort((index, target != current, target))
+        ordered = target[order]
+        clash = np.zeros(len(target), dtype=bool)
+        clash[order[1:]] = ordered[1:] == ordered[:-1]
+        if not clash.any():
+            break
+        target[clash] = current[clash]
+    return target
+
+
+class CrowdState:
+    """Every police unit and thief, as flat indices into the padded grid.
+
+    Each tick the thieves move first, each to the open neighbour (or its own
+    cell) farthest from the nearest police unit, then the police move, each
+    to the neighbour nearest a thief. Two units of one side never share a
+    cell: when several claim one, a unit staying put keeps it, then the
+    lowest-numbered mover wins and the rest stay where they were. A thief is
+    caught if it ends either half-tick on a cell holding police (so
+    stepping into a police unit or swapping places with one counts) and is
+    removed. Small random noise breaks ties so crowds don't move in lockstep.
+    """
+
+    def __init__(self, police=200, thieves=200, size=500, density=OBSTACLE_DENSITY, seed=None):
+        self.rng = random.Random(seed)
+        self.size = size
+        self.grid, _ = generate_valid_grid(self.rng, size, density)
+        self.width = size + 2
+        padded = np.zeros((self.width, self.width), dtype=bool)
+        padded[1:-1, 1:-1] = self.grid != 1
+        self.passable = padded.ravel()
+        self.noise = np.random.default_rng(self.rng.getrandbits(64))
+        cells = np.flatnonzero(self.passable)
+        picks = self.noise.choice(cells, min(police + thieves, len(cells)), replace=False)
+        self.police = picks[:police]
+        self.thieves = picks[police:]
+        self.steps = np.array((0, -self.width, self.width, -1, 1))
+        self.ticks = 0
+        self.caught = 0
+        self.field_time = 0.0
+
+    def cells(self, units):
+        x, y = np.divmod(units, self.width)
+        return np.column_stack((x - 1, y - 1))
+
+    def _capture(self, events):
+        caught = np.isin(self.thieves, self.police)
+        if caught.any():
+            events.append({"type": "capture", "cells": [tuple(cell) for cell in self.cells(self.thieves[caught]).tolist()]})
+            self.caught += int(caught.sum())
+            self.thieves = self.thieves[~caught]
+
+    def _field(self, sources, limit=None):
+        start = time.perf_counter()
+        field = multi_source_bfs(self.passable, self.width, sources, limit)
+        self.field_time += time.perf_counter() - start
+        return field
+
+    def _choose(self, units, field, sign):
+        # Best of stay + 4 moves per unit by the field: sign -1 heads down it, +1 climbs it
+        options = units[:, None] + self.steps
+        dist = field[options]
+        score = np.where(dist < 0, FAR, dist) * sign + self.noise.random(options.shape) * 0.5
+        score[~self.passable[options]] = -np.inf
+        return options[np.arange(len(units)), score.argmax(axis=1)]
+
+
+def crowd_step(state):
+    """Advance one tick; returns the events produced (capture events list the cells)."""
+    events = []
+    if len(state.thieves) and len(state.police):
+        field = state._field(state.police, THIEF_HORIZON)
+        state.thieves = _resolve(state.thieves, state._choose(state.thieves, field, 1))
+        state._capture(events)
+    if len(state.thieves) and len(state.police):
+        field = state._field(state.thieves)
+        state.police = _resolve(state.police, state._choose(state.police, field, -1))
+        state._capture(events)
+    state.ticks += 1
+    if not len(state.thieves):
+        events.append({"type": "cleared", "ticks": state.ticks})
+    return events
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--police", type=int, default=200)
+    parser.add_argument("--thieves", type=int, default=200)
+    parser.add_argument("--size", type=int, default=500)
+    parser.add_argument("--density", type=float, default=OBSTACLE_DENSITY)
+    parser.add_argument("--ticks", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    state = CrowdState(args.police, args.thieves, args.size, args.density, args.seed)
+    tick_times = []
+    for _ in range(args.ticks):
+        start = time.perf_counter()
+        events = crowd_step(state)
+        tick_times.append(time.perf_counter() - start)
+        if any(event["type"] == "cleared" for event in events):
+            break
+        if state.ticks % 50 == 0:
+            print(f"tick {state.ticks:>5}: {len(state.thieves)} thieves left, {state.caught} caught", flush=True)
+
+    ms = np.array(tick_times) * 1000
+    p50, p99 = np.percentile(ms, (50, 99))
+    print(f"{state.ticks} ticks, {state.caught} caught, {len(state.thieves)} left")
+    print(f"tick mean {ms.mean():.2f} ms, p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {ms.max():.2f} ms "
+          f"({1000 / ms.mean():.0f} ticks/s); distance fields {state.field_time / state.ticks * 1000:.2f} ms/tick")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,31 @@
+import time
+START_TIME = time.perf_counter()
 import pygame
 import asyncio
 import platform
-import heapq
-from collections import deque
 import random
 import math
+import os
 import numpy as np
+from audio import Sounds, default_cache_dir
+from particles import ParticlePool
+from planning import AsyncRoutePlanner
+from replay import Recorder
+from presentation import DirtyRegions
+from profiler import FrameProfiler
+from quality import QualityGovernor
+from surfaces import SurfaceCache
+from scheduler import FixedStepScheduler
+from telemetry import Telemetry, LEVELS, INFO, DEBUG
+from pickups import pickup_code, visible_pickups
+from simulation import GRID_SIZE, SimState, step, manhattan_distance, TOGGLE_AUTO, DIFFICULTIES, POLICE_PLANNERS
+
+IS_WEB = platform.system() == "Emscripten"
 
 WIDTH, HEIGHT = 600, 600
-GRID_SIZE = 20
 CELL_SIZE = WIDTH // GRID_SIZE
 FPS = 60
-LEVEL_TIME_LIMIT = 60
+SIM_RATE = 30
 
 # Colors
 NEON_PINK = (255, 0, 127)
@@ -23,74 +37,72 @@ GRAY = (80, 80, 80)
 BLACK = (0, 0, 0)
 YELLOW = (255, 255, 0)
 POWER_UP_COLOR = (200, 0, 200)
+# Drawn per pickup code
+PICKUP_COLORS = {pickup_code("boost"): POWER_UP_COLOR, pickup_code("time"): (0, 255, 140), pickup_code("bonus"): YELLOW}
 PATH_COLOR = (30, 30, 30)
 
+# Console output goes through a buffered sink; CATCH_THIEF_LOG picks the level (debug/info/warning/error/off)
+# and CATCH_THIEF_LOG_FORMAT=json switches to one JSON object per line
+telemetry = Telemetry(LEVELS.get(os.environ.get("CATCH_THIEF_LOG", "warning" if IS_WEB else "info"), INFO),
+                      fmt=os.environ.get("CATCH_THIEF_LOG_FORMAT", "text"), threaded=not IS_WEB)
+
+# F3 toggles the per-stage profiler overlay; CATCH_THIEF_PROFILE=<file.csv|file.json> profiles from the start and dumps on exit
+PROFILE_PATH = os.environ.get("CATCH_THIEF_PROFILE")
+# CATCH_THIEF_RECORD=<dir> writes a replay of every chase there (play back with replay.py)
+RECORD_DIR = os.environ.get("CATCH_THIEF_RECORD")
+profiler = FrameProfiler(enabled=bool(PROFILE_PATH))
+
 highscore = 0
-particles = []
+# Text, glow and overlay surfaces keyed by what they show, so steady-state frames allocate none
+surfaces = SurfaceCache()
+HUD_SEPARATOR = " | "
+profiler_panel = None
+PARTICLE_CAPACITY = 5000
+particles = ParticlePool(PARTICLE_CAPACITY)
 screen_shake = 0
 
-def generate_valid_grid():
-    for _ in range(10):
-        grid = [[0 if random.random() > 0.3 else 1 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-        grid[0][0] = 0
-        grid[GRID_SIZE-1][GRID_SIZE-1] = 0
-        path = bfs_path((0, 0), (GRID_SIZE-1, GRID_SIZE-1), grid)
-        if path:
-            return grid, True
-    grid = [[0 for _ in range(GRID_SIZE)] for _ in range(GRID_SIZE)]
-    grid[0][0] = 0
-    grid[GRID_SIZE-1][GRID_SIZE-1] = 0
-    return grid, False
-
-def bfs_path(start, target, grid):
-    queue = deque([(start, [])])
-    visited = {start}
-    while queue:
-        (x, y), path = queue.popleft()
-        if (x, y) == target:
-            return path + [(x, y)]
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            new_x, new_y = x + dx, y + dy
-            if 0 <= new_x < GRID_SIZE and 0 <= new_y < GRID_SIZE and grid[new_x][new_y] != 1 and (new_x, new_y) not in visited:
-                visited.add((new_x, new_y))
-                queue.append(((new_x, new_y), path + [(x, y)]))
-    return []
-
-city_grid, valid_grid = generate_valid_grid()
-power_ups = []
-road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if city_grid[x][y] == 0 and (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]]
-for _ in range(3):
-    if road_cells:
-        x, y = random.choice(road_cells)
-        city_grid[x][y] = 2
-        power_ups.append((x, y))
-        road_cells.remove((x, y))
-
-police_pos = [0, 0]
-thief_pos = [GRID_SIZE-1, GRID_SIZE-1]
-caught = False
+# Created in setup() so importing the module builds no grid
+sim = None
 game_state = "welcome"
 difficulty = "Medium"
-difficulty_probs = {
-    "Easy": {"random": 0.7, "avoid": 0.2, "stay": 0.1},
-    "Medium": {"random": 0.4, "avoid": 0.5, "stay": 0.1},
-    "Hard": {"random": 0.1, "avoid": 0.8, "stay": 0.1}
-}
-start_time = 0
-score = 0
-police_auto = True
 paused = False
-pause_start_time = 0
-total_pause_time = 0
-power_up_active = False
-power_up_timer = 0
-move_interval = 0.5
 invalid_move_timer = 0
 grid_warning = False
-thief_stuck_counter = 0
-police_stuck_counter = 0
-last_thief_pos = thief_pos.copy()
-last_police_pos = police_pos.copy()
+scheduler = FixedStepScheduler(SIM_RATE)
+# Positions at the previous simulation tick, for interpolated drawing
+prev_police_pos = prev_thief_pos = None
+
+# Sounds open after the first frame; synthesized buffers are cached on disk (CATCH_THIEF_CACHE overrides the
+# directory, an empty value disables the cache). The web build stays silent.
+sounds = Sounds(os.environ.get("CATCH_THIEF_CACHE", default_cache_dir()) or None, enabled=not IS_WEB, telemetry=telemetry)
+
+# Fonts are opened on first use, one per size
+FONT_SIZE, SMALL_FONT_SIZE, TITLE_FONT_SIZE = 28, 16, 72
+fonts = {}
+
+# Milliseconds spent in each startup phase, logged once the first frame is on screen
+startup = {}
+
+# Steps rain, particles, glows, pulsing and shake down when frames run long; CATCH_THIEF_QUALITY=<tier> pins one
+quality = QualityGovernor(1.0 / FPS, pinned=os.environ.get("CATCH_THIEF_QUALITY", "").capitalize() or None,
+                          telemetry=telemetry)
+particles.set_limit(quality.tier["particles"])
+# Pickup sprites per (code, radius, cell size)
+pickup_sprites = {}
+
+# Menu backdrop: gradient and skyline baked once per (width, height, seed)
+SKYLINE_SEED = 7
+skyline_cache = {}
+RAIN_DROPS = 100
+rain_rng = np.random.default_rng()
+
+# Walls and roads pre-rendered off-screen; rebuilt when sim.grid is replaced
+grid_layer = None
+grid_layer_source = None
+
+# During play only the changed rects are redrawn and sent to the display; everything else falls back to a flip
+presenter = DirtyRegions((WIDTH, HEIGHT))
+last_frame_key = None
 
 resume_button_rect = pygame.Rect(WIDTH // 2 - 120, HEIGHT // 2 + 20, 240, 60)
 mainmenu_button_rect = pygame.Rect(WIDTH // 2 - 120, HEIGHT // 2 + 100, 240, 60)
@@ -104,251 +116,212 @@ def create_sprite(color, glow_color, size):
     return surface
 
 def add_particles(x, y, color, count=10):
-    global particles
-    for _ in range(count):
-        angle = random.random() * 2 * math.pi
-        speed = random.uniform(1, 3)
-        particles.append({
-            "pos": [x, y],
-            "vel": [math.cos(angle) * speed, math.sin(angle) * speed],
-            "color": color,
-            "life": random.uniform(0.5, 1.5)
-        })
+    particles.emit(x, y, color, count)
 
 def update_particles(dt):
-    global particles
-    new_particles = []
-    for p in particles:
-        p["pos"][0] += p["vel"][0] * dt * 60
-        p["pos"][1] += p["vel"][1] * dt * 60
-        p["life"] -= dt
-        if p["life"] > 0:
-            new_particles.append(p)
-    particles = new_particles
+    particles.update(dt)
+
+def get_font(size):
+    font = fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        try:
+            font = pygame.font.Font(pygame.font.match_font("neuropol", "arial"), size)
+        except Exception:
+            font = pygame.font.SysFont("arial", size)
+        fonts[size] = font
+    return font
+
+def mark_startup(phase, since):
+    now = time.perf_counter()
+    startup[phase] = round((now - since) * 1000, 2)
+    return now
 
 def setup():
-    global screen, clock, font, title_font, button_rect, difficulty_rects, click_sound, catch_sound, bg_music
-    global police_sprite, thief_sprite, rain_particles
-    pygame.init()
+    global screen, clock, button_rect, difficulty_rects, sim, prev_police_pos, prev_thief_pos
+    global police_sprite, thief_sprite, rain_pos, rain_vel, RECORD_DIR
+    begin = time.perf_counter()
+    startup.setdefault("import", round((begin - START_TIME) * 1000, 2))
+    # Only the display; fonts and the mixer are opened when first needed
+    pygame.display.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Catch the Thief")
     clock = pygame.time.Clock()
-    try:
-        font = pygame.font.Font(pygame.font.match_font("neuropol", "arial"), 28)
-        title_font = pygame.font.Font(pygame.font.match_font("neuropol", "arial"), 72)
-    except:
-        font = pygame.font.SysFont("arial", 28)
-        title_font = pygame.font.SysFont("arial", 72)
-    
+    # Starts SDL's timer, which pygame.time.get_ticks() reads; pygame.init() is skipped so it would stay at 0
+    clock.tick()
+    now = mark_startup("display", begin)
+
+    sim = SimState(prefetch_grids=not IS_WEB)
+    sim.profiler = profiler
+    planner = os.environ.get("CATCH_THIEF_PLANNER", "field")
+    if planner not in POLICE_PLANNERS:
+        telemetry.warning("unknown_police_planner", planner=planner, planners="/".join(POLICE_PLANNERS))
+        planner = "field"
+    sim.police_planner = planner
+    if RECORD_DIR:
+        try:
+            os.makedirs(RECORD_DIR, exist_ok=True)
+        except OSError as e:
+            telemetry.warning("replay_dir_unavailable", path=RECORD_DIR, error=str(e))
+            RECORD_DIR = None
+    # Police routes are searched off the frame; Emscripten has no threads, so the web build plans inline
+    if not IS_WEB:
+        sim.route_planner = AsyncRoutePlanner()
+    prev_police_pos, prev_thief_pos = sim.police_pos, sim.thief_pos
+    now = mark_startup("sim", now)
+
     button_rect = pygame.Rect(WIDTH // 2 - 120, HEIGHT - 160, 240, 60)
     difficulty_rects = {
-        "Easy": pygame.Rect(WIDTH // 2 - 180, HEIGHT - 260, 120, 50),
-        "Medium": pygame.Rect(WIDTH // 2 - 60, HEIGHT - 260, 120, 50),
-        "Hard": pygame.Rect(WIDTH // 2 + 60, HEIGHT - 260, 120, 50)
+        diff: pygame.Rect(WIDTH // 2 - 60 * len(DIFFICULTIES) + 120 * i, HEIGHT - 260, 120, 50)
+        for i, diff in enumerate(DIFFICULTIES)
     }
     
     police_sprite = create_sprite(NEON_BLUE, WHITE, CELL_SIZE)
     thief_sprite = create_sprite(NEON_RED, WHITE, CELL_SIZE)
     
-    rain_particles = [{"pos": [random.randint(0, WIDTH), random.randint(0, HEIGHT // 2)], "vel": [0, random.uniform(5, 10)]} for _ in range(100)]
-    
-    if platform.system() != "Emscripten":
-        try:
-            pygame.mixer.init()
-            sample_rate = 44100
-            duration = 0.1
-            t = np.linspace(0, duration, int(sample_rate * duration))
-            click_wave = np.sin(2 * np.pi * 1000 * t)
-            click_array = (click_wave * 32767).astype(np.int16)
-            click_sound = pygame.mixer.Sound(click_array.tobytes())
-            duration = 0.2
-            t = np.linspace(0, duration, int(sample_rate * duration))
-            catch_wave = np.sin(2 * np.pi * 800 * t) + np.sin(2 * np.pi * 1000 * t)
-            catch_array = (catch_wave * 32767 / 2).astype(np.int16)
-            catch_sound = pygame.mixer.Sound(catch_array.tobytes())
-            duration = 2.0
-            t = np.linspace(0, duration, int(sample_rate * duration))
-            freqs = [220, 247, 262, 294]
-            wave = sum(np.sin(2 * np.pi * f * t) for f in freqs) / len(freqs)
-            music_array = (wave * 16383).astype(np.int16)
-            bg_music = pygame.mixer.Sound(music_array.tobytes())
-            bg_music.set_volume(0.3)
-            bg_music.play(-1)
-        except Exception as e:
-            print(f"Sound initialization failed: {e}")
-            click_sound = None
-            catch_sound = None
-            bg_music = None
-    else:
-        click_sound = None
-        catch_sound = None
-        bg_music = None
-    
-    if platform.system() != "Emscripten":
-        print("Initial Grid:")
-        for row in city_grid:
-            print(row)
-        print(f"Valid grid: {valid_grid}")
-
-def manhattan_distance(pos1, pos2):
-    return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
-
-def is_valid_move(x, y):
-    return 0 <= x < GRID_SIZE and 0 <= y < GRID_SIZE and city_grid[x][y] != 1
-
-def get_neighbors(pos):
-    x, y = pos
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    neighbors = []
-    for dx, dy in directions:
-        new_x, new_y = x + dx, y + dy
-        if is_valid_move(new_x, new_y):
-            neighbors.append((new_x, new_y))
-    return neighbors
-
-def a_star(start, goal):
-    if not is_valid_move(goal[0], goal[1]):
-        return []
-    open_set = [(0, start)]
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: manhattan_distance(start, goal)}
-    while open_set:
-        current = heapq.heappop(open_set)[1]
-        if current == goal:
-            path = []
-            while current in came_from:
-                path.append(current)
-                current = came_from[current]
-            return path[::-1]
-        for neighbor in get_neighbors(current):
-            tentative_g_score = g_score[current] + 1
-            if tentative_g_score < g_score.get(neighbor, float('inf')):
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g_score
-                f_score[neighbor] = tentative_g_score + manhattan_distance(neighbor, goal)
-                heapq.heappush(open_set, (f_score[neighbor], neighbor))
-    return []
-
-def bfs_police_path(start, target):
-    if not is_valid_move(target[0], target[1]):
-        road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if is_valid_move(x, y)]
-        if not road_cells:
-            if platform.system() != "Emscripten":
-                print("No valid road cells found!")
-            return []
-        target = min(road_cells, key=lambda p: manhattan_distance(p, target))
-    
-    queue = deque([(start, [])])
-    visited = {start}
-    while queue:
-        (x, y), path = queue.popleft()
-        if (x, y) == target:
-            return path + [(x, y)]
-        for neighbor in get_neighbors((x, y)):
-            if neighbor not in visited:
-                visited.add(neighbor)
-                queue.append((neighbor, path + [(x, y)]))
+    rain_pos = np.column_stack((rain_rng.integers(0, WIDTH, RAIN_DROPS, endpoint=True), rain_rng.integers(0, HEIGHT // 2, RAIN_DROPS, endpoint=True))).astype(float)
+    rain_vel = rain_rng.uniform(5, 10, RAIN_DROPS)
+    mark_startup("setup", begin)
     
-    path = a_star(start, target)
-    if path:
-        return path
-    
-    neighbors = get_neighbors(start)
-    if neighbors:
-        return [min(neighbors, key=lambda p: manhattan_distance(p, target))]
-    
-    if platform.system() != "Emscripten":
-        print(f"No path found from {start} to {target}!")
-        for row in city_grid:
-            print(row)
-    return []
-
-def decide_thief_move():
-    global thief_pos, thief_stuck_counter
-    distance = manhattan_distance(thief_pos, police_pos)
-    probs = difficulty_probs[difficulty]
-    neighbors = get_neighbors(tuple(thief_pos))
-    
-    if neighbors:
-        choice = random.random()
-        cumulative = 0
-        for action, prob in [("random", probs["random"]), ("avoid", probs["avoid"]), ("stay", probs["stay"])]:
-            cumulative += prob
-            if choice <= cumulative:
-                if action == "random":
-                    return random.choice(neighbors)
-                elif action == "avoid":
-                    best_move = max(neighbors, key=lambda p: manhattan_distance(p, tuple(police_pos)), default=thief_pos)
-                    return best_move
-                return thief_pos
-    return thief_pos
+    if telemetry.enabled(DEBUG):
+        telemetry.debug("grid", reason="initial", valid=sim.valid_grid, rows=sim.grid.tolist())
+
+def first_frame_done():
+    # Called after the first flip: report startup, then open audio now that the window is up
+    startup["first_frame"] = round((time.perf_counter() - START_TIME) * 1000, 2)
+    begin = time.perf_counter()
+    sounds.start()
+    mark_startup("mixer", begin)
+    telemetry.info("startup", **startup)
+
+def build_skyline(size, seed):
+    width, height = size
+    rng = random.Random(seed)
+    surface = pygame.Surface(size).convert()
+    for y in range(height):
+        b = 79 - (y * (79 - 0) // height)
+        pygame.draw.line(surface, (42, 0, b), (0, y), (width, y))
 
-def draw_city_background():
-    for y in range(HEIGHT):
-        b = 79 - (y * (79 - 0) // HEIGHT)
-        pygame.draw.line(screen, (42, 0, b), (0, y), (WIDTH, y))
-    
     for _ in range(20):
-        x = random.randint(0, WIDTH - 40)
-        w = random.randint(30, 60)
-        h = random.randint(100, 200)
-        pygame.draw.rect(screen, GRAY, (x, HEIGHT - h, w, h))
-        for _ in range(random.randint(3, 8)):
-            wx = random.randint(x + 5, x + w - 15)
-            wy = random.randint(HEIGHT - h + 10, HEIGHT - 10)
-            color = random.choice([NEON_PINK, NEON_BLUE])
-            pygame.draw.rect(screen, color, (wx, wy, 10, 10))
-    
-    for p in rain_particles:
-        p["pos"][1] += p["vel"][1] * (1 / FPS)
-        if p["pos"][1] > HEIGHT:
-            p["pos"] = [random.randint(0, WIDTH), 0]
-            p["vel"][1] = random.uniform(5, 10)
-        pygame.draw.line(screen, (100, 150, 255), p["pos"], (p["pos"][0], p["pos"][1] + 5))
+        x = rng.randint(0, width - 40)
+        w = rng.randint(30, 60)
+        h = rng.randint(100, 200)
+        pygame.draw.rect(surface, GRAY, (x, height - h, w, h))
+        for _ in range(rng.randint(3, 8)):
+            wx = rng.randint(x + 5, x + w - 15)
+            wy = rng.randint(height - h + 10, height - 10)
+            color = rng.choice([NEON_PINK, NEON_BLUE])
+            pygame.draw.rect(surface, color, (wx, wy, 10, 10))
+    return surface
+
+def update_rain(dt):
+    rain_pos[:, 1] += rain_vel * dt
+    fallen = rain_pos[:, 1] > HEIGHT
+    count = int(fallen.sum())
+    if count:
+        rain_pos[fallen, 0] = rain_rng.integers(0, WIDTH, count, endpoint=True)
+        rain_pos[fallen, 1] = 0
+        rain_vel[fallen] = rain_rng.uniform(5, 10, count)
+
+def draw_city_background():
+    key = (WIDTH, HEIGHT, SKYLINE_SEED)
+    skyline = skyline_cache.get(key)
+    if skyline is None:
+        skyline = skyline_cache[key] = build_skyline((WIDTH, HEIGHT), SKYLINE_SEED)
+    screen.blit(skyline, (0, 0))
+
+    update_rain(scheduler.frame_dt)
+    for x, y in rain_pos[:quality.tier["rain"]].tolist():
+        pygame.draw.line(screen, (100, 150, 255), (x, y), (x, y + 5))
 
 def draw_button(rect, text, color, hover):
     scale = 1.2 if hover else 1.0
     scaled_rect = rect.inflate(rect.width * (scale - 1), rect.height * (scale - 1))
-    glow_surface = pygame.Surface((scaled_rect.width + 10, scaled_rect.height + 10), pygame.SRCALPHA)
-    pygame.draw.rect(glow_surface, (*color, 50), (5, 5, scaled_rect.width, scaled_rect.height), border_radius=15)
-    screen.blit(glow_surface, (scaled_rect.x - 5, scaled_rect.y - 5))
+    if quality.tier["glow"]:
+        screen.blit(surfaces.glow(scaled_rect.size, color, 50, 5, 15), (scaled_rect.x - 5, scaled_rect.y - 5))
     pygame.draw.rect(screen, color, scaled_rect, border_radius=15)
     pygame.draw.rect(screen, WHITE if hover else BLACK, scaled_rect, 3, border_radius=15)
-    text_surface = font.render(text, True, WHITE)
+    text_surface = surfaces.text(get_font(FONT_SIZE), text, WHITE)
     text_rect = text_surface.get_rect(center=scaled_rect.center)
     screen.blit(text_surface, text_rect)
 
+def draw_title(text, color, center):
+    title = surfaces.text(get_font(TITLE_FONT_SIZE), text, color)
+    title_rect = title.get_rect(center=center)
+    if quality.tier["glow"]:
+        screen.blit(surfaces.glow(title_rect.size, color, 100, 10, 10), (title_rect.x - 10, title_rect.y - 10))
+    screen.blit(title, title_rect)
+
 def draw_welcome():
     draw_city_background()
-    title = title_font.render("Catch the Thief", True, NEON_PINK)
-    title_rect = title.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-    glow_surface = pygame.Surface((title_rect.width + 20, title_rect.height + 20), pygame.SRCALPHA)
-    pygame.draw.rect(glow_surface, (*NEON_PINK, 100), (10, 10, title_rect.width, title_rect.height), border_radius=10)
-    screen.blit(glow_surface, (title_rect.x - 10, title_rect.y - 10))
-    screen.blit(title, title_rect)
+    draw_title("Catch the Thief", NEON_PINK, (WIDTH // 2, HEIGHT // 4))
     
     mouse_pos = pygame.mouse.get_pos()
     for diff, rect in difficulty_rects.items():
         draw_button(rect, diff, NEON_PINK if diff == difficulty else GRAY, rect.collidepoint(mouse_pos))
     draw_button(button_rect, "Play Now", NEON_BLUE, button_rect.collidepoint(mouse_pos))
 
+def draw_cell(surface, value, x, y):
+    rect = pygame.Rect(y * CELL_SIZE, x * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+    if value == 1:
+        pygame.draw.rect(surface, GRAY, rect)
+        pygame.draw.rect(surface, NEON_BLUE, rect, 3)
+    else:
+        pygame.draw.rect(surface, PATH_COLOR, rect)
+        pygame.draw.rect(surface, WHITE, rect, 1)
+
 def draw_grid():
-    for x in range(GRID_SIZE):
-        for y in range(GRID_SIZE):
-            rect = pygame.Rect(y * CELL_SIZE, x * CELL_SIZE, CELL_SIZE, CELL_SIZE)
-            if city_grid[x][y] == 1:
-                pygame.draw.rect(screen, GRAY, rect)
-                pygame.draw.rect(screen, NEON_BLUE, rect, 3)
-            elif city_grid[x][y] == 2:
-                pulse = 1.0 + 0.3 * math.sin(pygame.time.get_ticks() / 500.0)
-                pygame.draw.circle(screen, POWER_UP_COLOR, (y * CELL_SIZE + CELL_SIZE // 2, x * CELL_SIZE + CELL_SIZE // 2), int(CELL_SIZE // 2 * pulse))
-            else:
-                pygame.draw.rect(screen, PATH_COLOR, rect)
-                pygame.draw.rect(screen, WHITE, rect, 1)
-
-def draw_entities(path=[]):
+    global grid_layer, grid_layer_source
+    city_grid = sim.grid
+    if grid_layer is None or grid_layer_source is not city_grid:
+        grid_layer = pygame.Surface((GRID_SIZE * CELL_SIZE, GRID_SIZE * CELL_SIZE)).convert()
+        grid_layer.fill(DEEP_PURPLE)
+        for x in range(GRID_SIZE):
+            for y in range(GRID_SIZE):
+                draw_cell(grid_layer, city_grid[x, y], x, y)
+        grid_layer_source = city_grid
+        presenter.partial = False
+    if not presenter.partial:
+        screen.blit(grid_layer, (0, 0))
+    draw_pickups()
+
+def draw_pickups():
+    # Only the cells inside the window are looked up; each kind is one sprite blitted in a batch
+    rows = min(GRID_SIZE, -(-HEIGHT // CELL_SIZE))
+    cols = min(GRID_SIZE, -(-WIDTH // CELL_SIZE))
+    xs, ys, codes = visible_pickups(sim.items, rows, cols)
+    if not len(codes):
+        return
+    pulse = 1.0 + 0.3 * math.sin(pygame.time.get_ticks() / 500.0) if quality.tier["pulse"] else 1.0
+    radius = int(CELL_SIZE // 2 * pulse)
+    for code in np.unique(codes).tolist():
+        sprite = pickup_sprite(code, radius)
+        shift = CELL_SIZE // 2 - sprite.get_width() // 2
+        mine = codes == code
+        corners = np.column_stack((ys[mine] * CELL_SIZE + shift, xs[mine] * CELL_SIZE + shift)).tolist()
+        rects = screen.blits([(sprite, corner) for corner in corners], presenter.partial)
+        for rect in rects or ():
+            presenter.add(rect)
+
+def pickup_sprite(code, radius):
+    # A pickup's cell in the background colour with its circle on top; pulsing circles can outgrow the cell
+    key = (code, radius, CELL_SIZE)
+    sprite = pickup_sprites.get(key)
+    if sprite is None:
+        size = max(CELL_SIZE, 2 * radius + 1)
+        center = size // 2
+        sprite = pickup_sprites[key] = pygame.Surface((size, size), pygame.SRCALPHA)
+        pygame.draw.rect(sprite, DEEP_PURPLE, (center - CELL_SIZE // 2, center - CELL_SIZE // 2, CELL_SIZE, CELL_SIZE))
+        pygame.draw.circle(sprite, PICKUP_COLORS[code], (center, center), radius)
+    return sprite
+
+def lerp_cell(prev, cur, alpha):
+    return (prev[1] + (cur[1] - prev[1]) * alpha) * CELL_SIZE, (prev[0] + (cur[0] - prev[0]) * alpha) * CELL_SIZE
+
+def draw_entities(path=[], alpha=1.0):
     global screen_shake
+    police_pos, thief_pos = sim.police_pos, sim.thief_pos
     offset_x = random.uniform(-screen_shake, screen_shake) if screen_shake > 0 else 0
     offset_y = random.uniform(-screen_shake, screen_shake) if screen_shake > 0 else 0
     screen_shake = max(0, screen_shake - 0.1)
@@ -356,53 +329,85 @@ def draw_entities(path=[]):
     if invalid_move_timer > 0:
         add_particles(police_pos[1] * CELL_SIZE + CELL_SIZE // 2, police_pos[0] * CELL_SIZE + CELL_SIZE // 2, NEON_PINK, 5)
     
-    screen.blit(police_sprite, (police_pos[1] * CELL_SIZE + offset_x, police_pos[0] * CELL_SIZE + offset_y))
-    screen.blit(thief_sprite, (thief_pos[1] * CELL_SIZE + offset_x, thief_pos[0] * CELL_SIZE + offset_y))
+    police_x, police_y = lerp_cell(prev_police_pos, police_pos, alpha)
+    thief_x, thief_y = lerp_cell(prev_thief_pos, thief_pos, alpha)
+    presenter.add(screen.blit(police_sprite, (police_x + offset_x, police_y + offset_y)))
+    presenter.add(screen.blit(thief_sprite, (thief_x + offset_x, thief_y + offset_y)))
     
     # Only draw path in auto mode
-    if police_auto and path:
+    if sim.police_auto and path:
         for x, y in path:
             rect = pygame.Rect(y * CELL_SIZE + CELL_SIZE // 4 + offset_x, x * CELL_SIZE + CELL_SIZE // 4 + offset_y, CELL_SIZE // 2, CELL_SIZE // 2)
-            pygame.draw.rect(screen, NEON_BLUE, rect)
+            presenter.add(pygame.draw.rect(screen, NEON_BLUE, rect))
     
-    for p in particles:
-        pygame.draw.circle(screen, p["color"], (int(p["pos"][0] + offset_x), int(p["pos"][1] + offset_y)), 2)
+    presenter.add(particles.draw(screen, offset_x, offset_y))
     
-    # HUD
-    hud_surface = pygame.Surface((WIDTH, 50), pygame.SRCALPHA)
-    pygame.draw.rect(hud_surface, (0, 0, 0, 150), (0, 0, WIDTH, 50), border_radius=5)
+    # HUD; the bar's rect covers the text drawn on it
+    presenter.add(screen.blit(surfaces.glow((WIDTH, 50), BLACK, 150, 0, 5), (0, HEIGHT - 50)))
     distance = manhattan_distance(police_pos, thief_pos)
-    adjusted_time = pygame.time.get_ticks() - start_time - total_pause_time
-    elapsed = adjusted_time // 1000
-    time_left = max(0, LEVEL_TIME_LIMIT - elapsed)
-    mode = "Auto" if police_auto else "Manual"
-    power_up_text = f"Power-Up: {int(power_up_timer)}s" if power_up_active else ""
+    elapsed = sim.elapsed
+    time_left = max(0, int(sim.time_limit) - elapsed)
+    mode = "Auto" if sim.police_auto else "Manual"
+    power_up_text = f"Power-Up: {int(sim.power_up_timer)}s" if sim.power_up_active else ""
     warning_text = "Grid Reset!" if grid_warning else ""
-    text = font.render(f"Diff: {difficulty} | Dist: {distance} | Time: {elapsed}s | Time Left: {time_left}s | Mode: {mode} | {power_up_text} | {warning_text}", True, WHITE)
-    hud_surface.blit(text, (10, 10))
-    screen.blit(hud_surface, (0, HEIGHT - 50))
-
-    pulse = 1.0 + 0.2 * math.sin(pygame.time.get_ticks() / 1000.0)
-    hs_text = font.render(f"Highscore: {highscore}", True, YELLOW)
+    # Each field is its own cached surface, so only the ones whose value changed are re-rendered
+    fields = (f"Diff: {difficulty}", f"Dist: {distance}", f"Time: {elapsed}s", f"Time Left: {time_left}s",
+              f"Mode: {mode}", power_up_text, warning_text)
+    x, y = 10, HEIGHT - 40
+    for i, field in enumerate(fields):
+        if i:
+            separator = surfaces.text(get_font(FONT_SIZE), HUD_SEPARATOR, WHITE)
+            screen.blit(separator, (x, y))
+            x += separator.get_width()
+        if field:
+            text = surfaces.text(get_font(FONT_SIZE), field, WHITE)
+            screen.blit(text, (x, y))
+            x += text.get_width()
+
+    hs_text = surfaces.text(get_font(FONT_SIZE), f"Highscore: {highscore}", YELLOW)
     hs_rect = hs_text.get_rect(topleft=(10, 10))
-    glow_surface = pygame.Surface((hs_rect.width + 10, hs_rect.height + 10), pygame.SRCALPHA)
-    pygame.draw.rect(glow_surface, (*YELLOW, int(100 * pulse)), (5, 5, hs_rect.width, hs_rect.height))
-    screen.blit(glow_surface, (hs_rect.x - 5, hs_rect.y - 5))
-    screen.blit(hs_text, hs_rect)
+    if quality.tier["glow"]:
+        pulse = 1.0 + 0.2 * math.sin(pygame.time.get_ticks() / 1000.0) if quality.tier["pulse"] else 1.0
+        presenter.add(screen.blit(surfaces.glow(hs_rect.size, YELLOW, int(100 * pulse), 5), (hs_rect.x - 5, hs_rect.y - 5)))
+    presenter.add(screen.blit(hs_text, hs_rect))
+
+    tier_text = surfaces.text(get_font(SMALL_FONT_SIZE), f"Quality: {quality.tier['name']}", WHITE)
+    presenter.add(screen.blit(tier_text, (WIDTH - 10 - tier_text.get_width(), 10)))
+
+    if profiler.enabled:
+        draw_profiler_overlay()
 
     if paused:
         draw_pause_overlay()
 
+def draw_profiler_overlay():
+    global profiler_panel
+    summary = profiler.summary()
+    lines = [f"{name:<13} {p50:6.2f} {p95:6.2f} {p99:6.2f}" for name, (p50, p95, p99) in summary.items()]
+    lines.insert(0, "stage ms        p50    p95    p99")
+    lines.append(f"alloc blocks/frame {profiler.allocations():+.0f}")
+    width, line_height = 260, get_font(SMALL_FONT_SIZE).get_linesize()
+    histogram = profiler.histogram()
+    height = line_height * len(lines) + 50
+    # One panel surface redrawn in place; its numbers change every frame, so they bypass the surface cache
+    if profiler_panel is None or profiler_panel.get_size() != (width, height):
+        profiler_panel = pygame.Surface((width, height), pygame.SRCALPHA)
+    panel = profiler_panel
+    panel.fill((0, 0, 0, 180))
+    for i, line in enumerate(lines):
+        panel.blit(get_font(SMALL_FONT_SIZE).render(line, True, WHITE), (8, 4 + i * line_height))
+    # Frame-time histogram, 2 ms per bar, last bar is everything slower
+    peak = max(histogram) or 1
+    bar_width = (width - 16) // len(histogram)
+    for i, count in enumerate(histogram):
+        bar_height = int(36 * count / peak)
+        color = NEON_BLUE if i < 8 else NEON_PINK
+        pygame.draw.rect(panel, color, (8 + i * bar_width, height - 6 - bar_height, bar_width - 2, bar_height))
+    presenter.add(screen.blit(panel, (WIDTH - width - 10, 60)))
+
 def draw_pause_overlay():
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200))
-    screen.blit(overlay, (0, 0))
-    title_surface = title_font.render("Paused", True, NEON_PINK)
-    title_rect = title_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 80))
-    glow_surface = pygame.Surface((title_rect.width + 20, title_rect.height + 20), pygame.SRCALPHA)
-    pygame.draw.rect(glow_surface, (*NEON_PINK, 100), (10, 10, title_rect.width, title_rect.height), border_radius=10)
-    screen.blit(glow_surface, (title_rect.x - 10, title_rect.y - 10))
-    screen.blit(title_surface, title_rect)
+    screen.blit(surfaces.overlay((WIDTH, HEIGHT), BLACK, 200), (0, 0))
+    draw_title("Paused", NEON_PINK, (WIDTH // 2, HEIGHT // 2 - 80))
     
     mouse_pos = pygame.mouse.get_pos()
     draw_button(resume_button_rect, "Resume", NEON_BLUE, resume_button_rect.collidepoint(mouse_pos))
@@ -413,349 +418,241 @@ def draw_game_over():
     global highscore
     draw_city_background()
     
-    title_surface = title_font.render("Game Over", True, NEON_PINK)
-    title_rect = title_surface.get_rect(center=(WIDTH // 2, HEIGHT // 4))
-    glow_surface = pygame.Surface((title_rect.width + 20, title_rect.height + 20), pygame.SRCALPHA)
-    pygame.draw.rect(glow_surface, (*NEON_PINK, 100), (10, 10, title_rect.width, title_rect.height), border_radius=10)
-    screen.blit(glow_surface, (title_rect.x - 10, title_rect.y - 10))
-    screen.blit(title_surface, title_rect)
+    draw_title("Game Over", NEON_PINK, (WIDTH // 2, HEIGHT // 4))
+    draw_title("Thief Caught!", NEON_BLUE, (WIDTH // 2, HEIGHT // 2))
     
-    text_surface = title_font.render("Thief Caught!", True, NEON_BLUE)
-    text_rect = text_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2))
-    glow_surface = pygame.Surface((text_rect.width + 20, text_rect.height + 20), pygame.SRCALPHA)
-    pygame.draw.rect(glow_surface, (*NEON_BLUE, 100), (10, 10, text_rect.width, text_rect.height), border_radius=10)
-    screen.blit(glow_surface, (text_rect.x - 10, text_rect.y - 10))
-    screen.blit(text_surface, text_rect)
-    
-    adjusted_time = pygame.time.get_ticks() - start_time - total_pause_time
-    elapsed = adjusted_time // 1000
-    score_text = font.render(f"Score: {max(10000 - elapsed * 100, 0)} | Time: {elapsed}s", True, WHITE)
+    elapsed = sim.elapsed
+    score_text = surfaces.text(get_font(FONT_SIZE), f"Score: {sim.score} | Time: {elapsed}s", WHITE)
     score_rect = score_text.get_rect(center=(WIDTH // 2, HEIGHT * 2 // 3))
     pygame.draw.rect(screen, DEEP_PURPLE, score_rect.inflate(20, 20), border_radius=10)
     screen.blit(score_text, score_rect)
     
-    score_final = max(10000 - elapsed * 100, 0)
-    if score_final > highscore:
-        highscore = score_final
-    hs_text = font.render(f"Highscore: {highscore}", True, YELLOW)
+    if sim.score > highscore:
+        highscore = sim.score
+    hs_text = surfaces.text(get_font(FONT_SIZE), f"Highscore: {highscore}", YELLOW)
     hs_rect = hs_text.get_rect(center=(WIDTH // 2, HEIGHT * 2 // 3 + 40))
     pygame.draw.rect(screen, DEEP_PURPLE, hs_rect.inflate(20, 20), border_radius=10)
     screen.blit(hs_text, hs_rect)
 
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 128))
-    screen.blit(overlay, (0, 0))
-    
-    pygame.display.flip()
+    screen.blit(surfaces.overlay((WIDTH, HEIGHT), BLACK, 128), (0, 0))
 
 def draw_game_failed():
     draw_grid()
-    overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 200))
-    screen.blit(overlay, (0, 0))
-    text_surface = title_font.render("You Failed!", True, NEON_PINK)
-    text_rect = text_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 80))
-    glow_surface = pygame.Surface((text_rect.width + 20, text_rect.height + 20), pygame.SRCALPHA)
-    pygame.draw.rect(glow_surface, (*NEON_PINK, 100), (10, 10, text_rect.width, text_rect.height), border_radius=10)
-    screen.blit(glow_surface, (text_rect.x - 10, text_rect.y - 10))
-    screen.blit(text_surface, text_rect)
+    screen.blit(surfaces.overlay((WIDTH, HEIGHT), BLACK, 200), (0, 0))
+    draw_title("You Failed!", NEON_PINK, (WIDTH // 2, HEIGHT // 2 - 80))
     
     mouse_pos = pygame.mouse.get_pos()
     draw_button(try_again_button_rect, "Try Again", NEON_BLUE, try_again_button_rect.collidepoint(mouse_pos))
     draw_button(mainmenu_button_rect, "Main Menu", GRAY, mainmenu_button_rect.collidepoint(mouse_pos))
-    
-    pygame.display.flip()
+
+KEY_ACTIONS = {
+    pygame.K_UP: "up", pygame.K_w: "up",
+    pygame.K_DOWN: "down", pygame.K_s: "down",
+    pygame.K_LEFT: "left", pygame.K_a: "left",
+    pygame.K_RIGHT: "right", pygame.K_d: "right",
+    pygame.K_m: TOGGLE_AUTO,
+}
+
+def save_replay():
+    # replay.py --render drives the game with a Player tape, which has nothing to save
+    if not isinstance(sim.tape, Recorder):
+        return
+    replay = sim.tape.finish(sim)
+    sim.tape = None
+    if replay.ticks:
+        path = os.path.join(RECORD_DIR, f"replay-{time.strftime('%Y%m%d-%H%M%S')}-{sim.seed:x}.ctr")
+        try:
+            replay.save(path)
+        except OSError as e:
+            telemetry.warning("replay_not_written", path=path, error=str(e))
+            return
+        telemetry.info("replay_written", path=path, ticks=replay.ticks, outcome=replay.outcome)
+
+def reset_game():
+    global paused, grid_warning, prev_police_pos, prev_thief_pos
+    save_replay()
+    sim.difficulty = difficulty
+    sim.reset()
+    if RECORD_DIR:
+        sim.tape = Recorder(sim, SIM_RATE)
+    prev_police_pos, prev_thief_pos = sim.police_pos, sim.thief_pos
+    paused = False
+    grid_warning = False
+
+def cell_center(pos):
+    return pos[1] * CELL_SIZE + CELL_SIZE // 2, pos[0] * CELL_SIZE + CELL_SIZE // 2
+
+def handle_sim_events(events):
+    global game_state, highscore, screen_shake, invalid_move_timer, grid_warning
+    for event in events:
+        kind = event["type"]
+        if kind == "mode":
+            telemetry.info("mode", mode="Auto" if event["auto"] else "Manual")
+            sounds.play("click")
+        elif kind == "invalid_move":
+            invalid_move_timer = 0.2
+            add_particles(*cell_center(event["pos"]), NEON_PINK, 5)
+        elif kind == "police_move":
+            telemetry.debug("move", police=event["pos"], thief=sim.thief_pos, path=event["path"])
+        elif kind == "grid_reset":
+            grid_warning = True
+            telemetry.info("grid_reset", reason=event["reason"], valid=sim.valid_grid)
+            if telemetry.enabled(DEBUG):
+                telemetry.debug("grid", reason=event["reason"], rows=sim.grid.tolist())
+        elif kind == "pickup":
+            add_particles(*cell_center(event["pos"]), NEON_BLUE, 20)
+            sounds.play("click")
+        elif kind == "capture":
+            game_state = "game_over"
+            if event["score"] > highscore:
+                highscore = event["score"]
+            if quality.tier["shake"]:
+                screen_shake = 5.0
+            add_particles(*cell_center(event["pos"]), NEON_PINK, 50)
+            sounds.play("catch")
+            telemetry.info("capture", pos=event["pos"], score=event["score"], time=sim.elapsed)
+            save_replay()
+        elif kind == "timeout":
+            game_state = "game_failed"
+            telemetry.info("timeout", police=sim.police_pos, thief=sim.thief_pos)
+            save_replay()
+
+def shutdown():
+    save_replay()
+    if PROFILE_PATH:
+        profiler.export(PROFILE_PATH)
+        telemetry.info("profile_written", path=PROFILE_PATH, frames=len(profiler.rows))
+    telemetry.info("frame_stats", **{key: round(value, 3) for key, value in scheduler.stats().items()})
+    if sim.route_planner is not None:
+        planner = sim.route_planner
+        telemetry.info("planner_stats", submitted=planner.submitted, cancelled=planner.cancelled, stale=planner.stale)
+        planner.close()
+    telemetry.info("grid_pool", hits=sim.grids.hits, misses=sim.grids.misses)
+    telemetry.info("presentation", **{key: round(value, 3) for key, value in presenter.stats().items()})
+    telemetry.info("surface_cache", hits=surfaces.hits, misses=surfaces.misses, size=len(surfaces.surfaces))
+    sim.grids.close()
+    telemetry.close()
+    pygame.quit()
 
 async def update_loop():
-    global police_pos, thief_pos, caught, game_state, difficulty, start_time, score, police_auto, paused, pause_start_time, total_pause_time, power_ups, power_up_active, power_up_timer, move_interval, invalid_move_timer, city_grid, grid_warning, thief_stuck_counter, police_stuck_counter, last_thief_pos, last_police_pos, screen_shake
-    global highscore
-    move_timer = 0
-    police_path = []
-    
+    global game_state, difficulty, paused, invalid_move_timer, grid_warning, prev_police_pos, prev_thief_pos, last_frame_key
+
     while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                return
-            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                mouse_pos = event.pos
-                if game_state == "welcome":
-                    for diff, rect in difficulty_rects.items():
-                        if rect.collidepoint(mouse_pos):
-                            difficulty = diff
-                            if click_sound:
-                                click_sound.play()
-                    if button_rect.collidepoint(mouse_pos):
-                        game_state = "playing"
-                        start_time = pygame.time.get_ticks()
-                        total_pause_time = 0
-                        if click_sound:
-                            click_sound.play()
-                elif game_state == "playing" and paused:
-                    if resume_button_rect.collidepoint(mouse_pos):
-                        paused = False
-                        total_pause_time += pygame.time.get_ticks() - pause_start_time
-                        if click_sound:
-                            click_sound.play()
-                    elif mainmenu_button_rect.collidepoint(mouse_pos) or quit_button_rect.collidepoint(mouse_pos):
-                        game_state = "welcome"
-                        police_pos = [0, 0]
-                        thief_pos = [GRID_SIZE-1, GRID_SIZE-1]
-                        caught = False
-                        police_auto = True
-                        paused = False
-                        power_up_active = False
-                        move_interval = 0.5
-                        total_pause_time = 0
-                        city_grid, valid_grid = generate_valid_grid()
-                        power_ups.clear()
-                        road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if city_grid[x][y] == 0 and (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]]
-                        for _ in range(3):
-                            if road_cells:
-                                x, y = random.choice(road_cells)
-                                city_grid[x][y] = 2
-                                power_ups.append((x, y))
-                                road_cells.remove((x, y))
-                        thief_stuck_counter = 0
-                        police_stuck_counter = 0
-                        if click_sound:
-                            click_sound.play()
-                elif game_state == "game_failed":
-                    if try_again_button_rect.collidepoint(mouse_pos):
-                        game_state = "playing"
-                        police_pos = [0, 0]
-                        thief_pos = [GRID_SIZE-1, GRID_SIZE-1]
-                        caught = False
-                        police_auto = True
-                        paused = False
-                        power_up_active = False
-                        move_interval = 0.5
-                        total_pause_time = 0
-                        city_grid, valid_grid = generate_valid_grid()
-                        power_ups.clear()
-                        road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if city_grid[x][y] == 0 and (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]]
-                        for _ in range(3):
-                            if road_cells:
-                                x, y = random.choice(road_cells)
-                                city_grid[x][y] = 2
-                                power_ups.append((x, y))
-                                road_cells.remove((x, y))
-                        thief_stuck_counter = 0
-                        police_stuck_counter = 0
-                        start_time = pygame.time.get_ticks()
-                        if click_sound:
-                            click_sound.play()
-                    elif mainmenu_button_rect.collidepoint(mouse_pos):
-                        game_state = "welcome"
-                        police_pos = [0, 0]
-                        thief_pos = [GRID_SIZE-1, GRID_SIZE-1]
-                        caught = False
-                        police_auto = True
-                        paused = False
-                        power_up_active = False
-                        move_interval = 0.5
-                        total_pause_time = 0
-                        city_grid, valid_grid = generate_valid_grid()
-                        power_ups.clear()
-                        road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if city_grid[x][y] == 0 and (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]]
-                        for _ in range(3):
-                            if road_cells:
-                                x, y = random.choice(road_cells)
-                                city_grid[x][y] = 2
-                                power_ups.append((x, y))
-                                road_cells.remove((x, y))
-                        thief_stuck_counter = 0
-                        police_stuck_counter = 0
-                        if click_sound:
-                            click_sound.play()
-            
-            if event.type == pygame.KEYDOWN and game_state == "playing":
-                if event.key == pygame.K_p:
-                    paused = not paused
-                    if paused:
-                        pause_start_time = pygame.time.get_ticks()
-                    else:
-                        total_pause_time += pygame.time.get_ticks() - pause_start_time
-                    if click_sound:
-                        click_sound.play()
-                if event.key == pygame.K_m:
-                    police_auto = not police_auto
-                    if platform.system() != "Emscripten":
-                        print(f"Switched to {'Auto' if police_auto else 'Manual'} mode")
-                    if click_sound:
-                        click_sound.play()
-                if event.key == pygame.K_q:
-                    pygame.quit()
+        profiler.begin_frame()
+        frame_start = time.perf_counter()
+        steps = scheduler.advance(game_state == "playing" and not paused)
+        frame_dt = scheduler.frame_dt
+        with profiler.stage("events"):
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    shutdown()
                     return
-                if not paused and not police_auto:
-                    new_pos = police_pos.copy()
-                    if event.key in (pygame.K_UP, pygame.K_w):
-                        new_pos[0] -= 1
-                    elif event.key in (pygame.K_DOWN, pygame.K_s):
-                        new_pos[0] += 1
-                    elif event.key in (pygame.K_LEFT, pygame.K_a):
-                        new_pos[1] -= 1
-                    elif event.key in (pygame.K_RIGHT, pygame.K_d):
-                        new_pos[1] += 1
-                    if is_valid_move(new_pos[0], new_pos[1]):
-                        police_pos = new_pos
-                        police_stuck_counter = 0
-                    else:
-                        invalid_move_timer = 0.2
-                        add_particles(police_pos[1] * CELL_SIZE + CELL_SIZE // 2, police_pos[0] * CELL_SIZE + CELL_SIZE // 2, NEON_PINK, 5)
-        
-        screen.fill(DEEP_PURPLE)
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    presenter.invalidate()
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    mouse_pos = event.pos
+                    if game_state == "welcome":
+                        for diff, rect in difficulty_rects.items():
+                            if rect.collidepoint(mouse_pos):
+                                difficulty = diff
+                                sounds.play("click")
+                        if button_rect.collidepoint(mouse_pos):
+                            game_state = "playing"
+                            reset_game()
+                            sounds.play("click")
+                    elif game_state == "playing" and paused:
+                        if resume_button_rect.collidepoint(mouse_pos):
+                            paused = False
+                            sounds.play("click")
+                        elif mainmenu_button_rect.collidepoint(mouse_pos) or quit_button_rect.collidepoint(mouse_pos):
+                            game_state = "welcome"
+                            reset_game()
+                            sounds.play("click")
+                    elif game_state == "game_failed":
+                        if try_again_button_rect.collidepoint(mouse_pos):
+                            game_state = "playing"
+                            reset_game()
+                            sounds.play("click")
+                        elif mainmenu_button_rect.collidepoint(mouse_pos):
+                            game_state = "welcome"
+                            reset_game()
+                            sounds.play("click")
+            
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    profiler.toggle()
+                if event.type == pygame.KEYDOWN and game_state == "playing":
+                    if event.key == pygame.K_p:
+                        paused = not paused
+                        sounds.play("click")
+                    if event.key == pygame.K_q:
+                        shutdown()
+                        return
+                    action = KEY_ACTIONS.get(event.key)
+                    if action == TOGGLE_AUTO or (action and not paused):
+                        handle_sim_events(step(sim, action))
+
+        # Partial frames only while playing on, unpaused, unshaken and over an unchanged grid layer
+        frame_key = (game_state, paused)
+        if presenter.begin(frame_key == last_frame_key and game_state == "playing" and not paused
+                           and screen_shake == 0 and grid_layer_source is sim.grid):
+            presenter.restore(screen, grid_layer, DEEP_PURPLE)
+        else:
+            screen.fill(DEEP_PURPLE)
+        last_frame_key = frame_key
         
         if game_state == "welcome":
             draw_welcome()
         elif game_state == "playing":
             if not paused:
-                update_particles(1 / FPS)
-                adjusted_time = pygame.time.get_ticks() - start_time - total_pause_time
-                elapsed = adjusted_time // 1000
-                if elapsed >= LEVEL_TIME_LIMIT and not caught:
-                    game_state = "game_failed"
-                    if platform.system() != "Emscripten":
-                        print("Time limit exceeded! Switching to game_failed state")
-                    continue
-                
+                update_particles(frame_dt)
                 if invalid_move_timer > 0:
-                    invalid_move_timer -= 1 / FPS
+                    invalid_move_timer -= frame_dt
                 if grid_warning:
                     grid_warning = False
-                
-                if power_up_active:
-                    power_up_timer -= 1 / FPS
-                    if power_up_timer <= 0:
-                        power_up_active = False
-                        move_interval = 0.5
-                
-                move_timer += 1 / FPS
-                if move_timer >= move_interval:
-                    new_pos = decide_thief_move()
-                    if new_pos != tuple(thief_pos):
-                        thief_pos = list(new_pos)
-                        thief_stuck_counter = 0
-                    else:
-                        thief_stuck_counter += 1
-                    
-                    if thief_stuck_counter >= 10:
-                        city_grid, valid_grid = generate_valid_grid()
-                        power_ups.clear()
-                        road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if city_grid[x][y] == 0 and (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]]
-                        for _ in range(3):
-                            if road_cells:
-                                x, y = random.choice(road_cells)
-                                city_grid[x][y] = 2
-                                power_ups.append((x, y))
-                                road_cells.remove((x, y))
-                        grid_warning = True
-                        thief_stuck_counter = 0
-                        police_stuck_counter = 0
-                        if platform.system() != "Emscripten":
-                            print("Grid Regenerated due to thief stuck:")
-                            for row in city_grid:
-                                print(row)
-                    
-                    if police_auto:
-                        police_path = bfs_police_path(tuple(police_pos), tuple(thief_pos))
-                        if platform.system() != "Emscripten":
-                            print(f"Auto mode: Police pos = {police_pos}, Thief pos = {thief_pos}, Path = {police_path}")
-                        if len(police_path) > 1:
-                            police_pos = list(police_path[1])
-                            police_stuck_counter = 0
-                            if platform.system() != "Emscripten":
-                                print(f"Police moved to: {police_pos}")
-                        elif len(police_path) == 1:
-                            police_stuck_counter = 0
-                        else:
-                            police_stuck_counter += 1
-                    
-                    if police_stuck_counter >= 10:
-                        city_grid, valid_grid = generate_valid_grid()
-                        power_ups.clear()
-                        road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if city_grid[x][y] == 0 and (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]]
-                        for _ in range(3):
-                            if road_cells:
-                                x, y = random.choice(road_cells)
-                                city_grid[x][y] = 2
-                                power_ups.append((x, y))
-                                road_cells.remove((x, y))
-                        grid_warning = True
-                        thief_stuck_counter = 0
-                        police_stuck_counter = 0
-                        if platform.system() != "Emscripten":
-                            print("Grid Regenerated due to police stuck:")
-                            for row in city_grid:
-                                print(row)
-                    
-                    if not police_auto:
-                        police_path = bfs_police_path(tuple(police_pos), tuple(thief_pos))
-                    
-                    if tuple(police_pos) in power_ups:
-                        power_ups.remove(tuple(police_pos))
-                        city_grid[police_pos[0]][police_pos[1]] = 0
-                        power_up_active = True
-                        power_up_timer = 10
-                        move_interval = 0.25
-                        add_particles(police_pos[1] * CELL_SIZE + CELL_SIZE // 2, police_pos[0] * CELL_SIZE + CELL_SIZE // 2, NEON_BLUE, 20)
-                        if click_sound:
-                            click_sound.play()
-                    
-                    if police_pos == thief_pos:
-                        caught = True
-                        game_state = "game_over"
-                        adjusted_time = pygame.time.get_ticks() - start_time - total_pause_time
-                        elapsed = adjusted_time // 1000
-                        score = max(10000 - elapsed * 100, 0)
-                        if score > highscore:
-                            highscore = score
-                        screen_shake = 5.0
-                        add_particles(police_pos[1] * CELL_SIZE + CELL_SIZE // 2, police_pos[0] * CELL_SIZE + CELL_SIZE // 2, NEON_PINK, 50)
-                        if catch_sound:
-                            catch_sound.play()
-                        if platform.system() != "Emscripten":
-                            print("Thief caught! Switching to game_over state")
-                    
-                    move_timer = 0
+                for _ in range(steps):
+                    tick_start = time.perf_counter()
+                    prev_police_pos, prev_thief_pos = sim.police_pos, sim.thief_pos
+                    handle_sim_events(step(sim, None, scheduler.dt))
+                    scheduler.record_tick(time.perf_counter() - tick_start)
+                    if game_state != "playing":
+                        break
+                if game_state == "game_failed":
+                    continue
             
-            draw_grid()
-            draw_entities(police_path)
+            with profiler.stage("draw_grid"):
+                draw_grid()
+            with profiler.stage("draw_entities"):
+                draw_entities(sim.police_path, scheduler.alpha if game_state == "playing" and not paused else 1.0)
         elif game_state == "game_over":
             draw_game_over()
-            await asyncio.sleep(3)
-            game_state = "welcome"
-            police_pos = [0, 0]
-            thief_pos = [GRID_SIZE-1, GRID_SIZE-1]
-            caught = False
-            police_auto = True
-            paused = False
-            power_up_active = False
-            move_interval = 0.5
-            total_pause_time = 0
-            city_grid, valid_grid = generate_valid_grid()
-            power_ups.clear()
-            road_cells = [(x, y) for x in range(GRID_SIZE) for y in range(GRID_SIZE) if city_grid[x][y] == 0 and (x, y) not in [(0, 0), (GRID_SIZE-1, GRID_SIZE-1)]]
-            for _ in range(3):
-                if road_cells:
-                    x, y = random.choice(road_cells)
-                    city_grid[x][y] = 2
-                    power_ups.append((x, y))
-                    road_cells.remove((x, y))
-            thief_stuck_counter = 0
-            police_stuck_counter = 0
         elif game_state == "game_failed":
             draw_game_failed()
         
-        pygame.display.flip()
+        with profiler.stage("flip"):
+            presenter.present()
+        profiler.end_frame()
+        tier = quality.update(time.perf_counter() - frame_start)
+        if tier is not None:
+            particles.set_limit(tier["particles"])
+            telemetry.info("quality", tier=tier["name"], frame_ms=round(quality.mean * 1000, 2))
+        if game_state == "game_over":
+            # The screen just presented stays up for the pause, which isn't frame work, then back to the menu
+            await asyncio.sleep(3)
+            game_state = "welcome"
+            reset_game()
+            scheduler.reset()
+        if "first_frame" not in startup:
+            first_frame_done()
+        sounds.pump()
+        telemetry.pump()
         clock.tick(FPS)
-        await asyncio.sleep(1.0 / FPS)
+        await asyncio.sleep(0)
 
 async def main():
     setup()
     await update_loop()
 
-if platform.system() == "Emscripten":
+if IS_WEB:
     asyncio.ensure_future(main())
 else:
     if __name__ == "__main__":
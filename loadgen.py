@@ -0,0 +1,176 @@
+"""Drive a running server.py with many concurrent players and report input latency and throughput.
+
+    python loadgen.py --clients 300 --duration 20
+    python loadgen.py --clients 100 --rate 8 --websocket
+
+Each client connects, steers its police car with random manual moves at
+--rate inputs per second and starts a new chase whenever one ends. The
+latency of an input is the time from sending it to receiving the first
+message that acknowledges it, so it includes the wait for the next
+server tick (up to one tick interval).
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import struct
+import sys
+import time
+
+import numpy as np
+
+from simulation import MOVES
+
+ACTIONS = tuple(MOVES)
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.messages = 0
+        self.bytes = 0
+        self.chases = 0
+        self.errors = 0
+        self.connected = 0
+
+
+class LineClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def receive(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("server closed the connection")
+        return line
+
+    def send(self, message):
+        self.writer.write(json.dumps(message).encode() + b"\n")
+
+
+class WebSocketClient:
+    """Client side of the server's WebSocket framing: frames sent masked, as RFC 6455 requires."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def handshake(self, host, port):
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET / HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                           f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        status = await self.reader.readline()
+        if b" 101 " not in status:
+            raise ConnectionError(f"upgrade refused: {status!r}")
+        while (await self.reader.readline()).strip():
+            pass
+
+    async def receive(self):
+        head = await self.reader.readexactly(2)
+        length = head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack(">H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack(">Q", await self.reader.readexactly(8))[0]
+        return await self.reader.readexactly(length)
+
+    def send(self, message):
+        payload = json.dumps(message).encode()
+        mask = os.urandom(4)
+        masked = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(mask, np.uint8), len(payload))).tobytes()
+        self.writer.write(struct.pack(">BB", 0x81, 0x80 | len(payload)) + mask + masked)
+
+
+async def player(args, stats, rng, stop_at):
+    if args.websocket:
+        reader, writer = await asyncio.open_connection(args.host, args.ws_port)
+        client = WebSocketClient(reader, writer)
+        await client.handshake(args.host, args.ws_port)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+        client = LineClient(reader, writer)
+    stats.connected += 1
+    sent = {}
+
+    async def listen():
+        while True:
+            data = await client.receive()
+            now = time.perf_counter()
+            stats.messages += 1
+            stats.bytes += len(data)
+            message = json.loads(data)
+            ack = message.get("ack")
+            if ack in sent:
+                stats.latencies.append(now - sent.pop(ack))
+                # Older ids were applied in the same batch
+                for stale in [i for i in sent if i < ack]:
+                    stats.latencies.append(now - sent.pop(stale))
+            kind = message["type"]
+            if kind == "end":
+                stats.chases += 1
+                client.send({"type": "reset"})
+            elif kind == "error":
+                stats.errors += 1
+
+    listener = asyncio.create_task(listen())
+    next_id = 0
+    try:
+        # Spread the first inputs so clients don't all send in the same instant
+        await asyncio.sleep(rng.random() / args.rate)
+        while time.perf_counter() < stop_at and not listener.done():
+            client.send({"action": rng.choice(ACTIONS), "id": next_id})
+            sent[next_id] = time.perf_counter()
+            next_id += 1
+            await asyncio.sleep(rng.expovariate(args.rate))
+        if listener.done():
+            listener.result()
+    finally:
+        listener.cancel()
+        writer.close()
+
+
+async def run(args):
+    stats = Stats()
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    tasks = []
+    for _ in range(args.clients):
+        tasks.append(asyncio.create_task(player(args, stats, random.Random(rng.getrandbits(64)), stop_at)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failed = [r for r in results if isinstance(r, BaseException)]
+    ms = np.array(stats.latencies) * 1000 if stats.latencies else np.zeros(1)
+    p50, p90, p99 = np.percentile(ms, (50, 90, 99))
+    print(f"{stats.connected}/{args.clients} clients connected, {len(failed)} failed over {elapsed:.1f}s")
+    print(f"inputs acked: {len(stats.latencies)} ({len(stats.latencies) / elapsed:.0f}/s), latency p50 {p50:.1f} ms, "
+          f"p90 {p90:.1f} ms, p99 {p99:.1f} ms, max {ms.max():.1f} ms")
+    print(f"messages in: {stats.messages / elapsed:.0f}/s, {stats.bytes / elapsed / 1024:.0f} KiB/s; "
+          f"chases finished: {stats.chases}; errors: {stats.errors}")
+    if failed:
+        print(f"first failure: {failed[0]!r}")
+    return 1 if failed or stats.errors else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ws-port", type=int, default=8766)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=5.0, help="inputs per second per client (default 5)")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds to run (default 15)")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which clients connect (default 2)")
+    parser.add_argument("--websocket", action="store_true", help="connect to --ws-port over WebSocket instead of plain TCP")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
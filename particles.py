@@ -0,0 +1,98 @@
+import math
+import numpy as np
+import pygame
+
+
+class ParticlePool:
+    """Fixed-capacity particles stored as parallel arrays.
+
+    Live particles occupy the first ``count`` slots. Dead ones are recycled
+    by moving live particles from the tail into their slots, so updates and
+    drawing only ever touch a dense prefix and nothing is allocated per
+    particle. ``limit`` caps live particles below the capacity without
+    reallocating.
+    """
+
+    def __init__(self, capacity, radius=2, seed=None):
+        self.capacity = capacity
+        self.limit = capacity
+        self.radius = radius
+        self.pos = np.zeros((capacity, 2), dtype=np.float32)
+        self.vel = np.zeros((capacity, 2), dtype=np.float32)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self.life = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+        self.dropped = 0
+        self.palette = []
+        self.sprites = []
+        self.rng = np.random.default_rng(seed)
+
+    def color_index(self, color):
+        color = tuple(color)
+        if color not in self.palette:
+            self.palette.append(color)
+            self.sprites.append(None)
+        return self.palette.index(color)
+
+    def emit(self, x, y, color, count=10):
+        n = min(count, self.limit - self.count)
+        self.dropped += count - n
+        if n <= 0:
+            return
+        start, end = self.count, self.count + n
+        angle = self.rng.random(n) * 2 * math.pi
+        speed = self.rng.uniform(1, 3, n)
+        self.pos[start:end] = (x, y)
+        self.vel[start:end, 0] = np.cos(angle) * speed
+        self.vel[start:end, 1] = np.sin(angle) * speed
+        self.color[start:end] = self.color_index(color)
+        self.life[start:end] = self.rng.uniform(0.5, 1.5, n)
+        self.count = end
+
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        self.pos[:n] += self.vel[:n] * (dt * 60)
+        self.life[:n] -= dt
+        alive = self.life[:n] > 0
+        keep = int(alive.sum())
+        if keep == n:
+            return
+        # Swap-remove: fill dead slots below `keep` with live particles from above it
+        holes = np.flatnonzero(~alive[:keep])
+        movers = keep + np.flatnonzero(alive[keep:])
+        for array in (self.pos, self.vel, self.color, self.life):
+            array[holes] = array[movers]
+        self.count = keep
+
+    def _sprite(self, index):
+        sprite = self.sprites[index]
+        if sprite is None:
+            size = self.radius * 2 + 1
+            sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, self.palette[index], (self.radius, self.radius), self.radius)
+            self.sprites[index] = sprite
+        return sprite
+
+    def draw(self, surface, offset_x=0, offset_y=0):
+        """Blit every live particle; returns the rect they cover, or None when there are none."""
+        n = self.count
+        if not n:
+            return None
+        corners = (self.pos[:n] + (offset_x - self.radius, offset_y - self.radius)).astype(np.int32)
+        colors = self.color[:n]
+        for index in np.unique(colors).tolist():
+            sprite = self._sprite(index)
+            surface.blits([(sprite, xy) for xy in corners[colors == index].tolist()], False)
+        (left, top), (right, bottom) = corners.min(axis=0).tolist(), corners.max(axis=0).tolist()
+        size = self.radius * 2 + 1
+        return pygame.Rect(left, top, right - left + size, bottom - top + size)
+
+    def set_limit(self, limit):
+        # Lowering the cap drops the newest particles at once
+        self.limit = min(limit, self.capacity)
+        self.count = min(self.count, self.limit)
+
+    def clear(self):
+        self.count = 0
@@ -0,0 +1,657 @@
+"""Grid search with flat cell indices and buffers reused across calls.
+
+The grid is stored padded by one blocked cell on every side, so a cell's
+four neighbours are always ``i - width``, ``i + width``, ``i - 1`` and
+``i + 1`` with no bounds checks. Searches keep one parent entry per cell
+instead of copying the path into every queue entry, and mark visited cells
+with a generation stamp so nothing has to be cleared between calls.
+
+Complexity: bfs() and a_star() are O(V + E) and O(E log V) in the cells
+they actually expand (jps() and ClusterGraph expand far fewer on open
+maps) and allocate nothing proportional to the grid except the returned
+path. The buffers are plain lists (faster to index than array.array in
+CPython) and cost about 70 bytes per cell once warm -- roughly 280 MB at
+2000x2000 (4M cells), allocated once per pathfinder.
+"""
+import heapq
+import numpy as np
+
+
+class GridPathfinder:
+    def __init__(self, size):
+        self.size = size
+        self.width = size + 2
+        cells = self.width * self.width
+        self.passable = bytearray(cells)
+        self.parent = [-1] * cells
+        self.cost = [0] * cells
+        self.stamp = [0] * cells
+        self.queue = [0] * cells
+        self.generation = 0
+        self.expanded = 0
+        self.jump_dirty = True
+        # Same order as the old (-1, 0), (1, 0), (0, -1), (0, 1) direction list
+        self.offsets = (-self.width, self.width, -1, 1)
+
+    def load(self, grid):
+        padded = np.zeros((self.width, self.width), dtype=np.uint8)
+        padded[1:-1, 1:-1] = np.asarray(grid) != 1
+        self.passable[:] = padded.tobytes()
+        self.jump_dirty = True
+
+    def set_cell(self, x, y, value):
+        self.passable[self.index(x, y)] = value != 1
+        self.jump_dirty = True
+
+    def index(self, x, y):
+        return (x + 1) * self.width + y + 1
+
+    def cell(self, i):
+        x, y = divmod(i, self.width)
+        return x - 1, y - 1
+
+    def is_open(self, x, y):
+        return 0 <= x < self.size and 0 <= y < self.size and self.passable[self.index(x, y)] == 1
+
+    def neighbors(self, pos):
+        x, y = pos
+        return [(x + dx, y + dy) for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)) if self.is_open(x + dx, y + dy)]
+
+    def _next_generation(self):
+        self.generation += 1
+        return self.generation
+
+    def _trace(self, i, start):
+        cell = self.cell
+        parent = self.parent
+        path = [cell(i)]
+        while i != start:
+            i = parent[i]
+            path.append(cell(i))
+        path.reverse()
+        return path
+
+    def bfs(self, start, target):
+        """Shortest path from start to target inclusive, or [] if unreachable."""
+        if start == target:
+            return [start]
+        if not self.is_open(*target):
+            return []
+        src = self.index(*start)
+        dst = self.index(*target)
+        gen = self._next_generation()
+        passable, parent, stamp, queue, offsets = self.passable, self.parent, self.stamp, self.queue, self.offsets
+        stamp[src] = gen
+        queue[0] = src
+        head, tail = 0, 1
+        while head < tail:
+            i = queue[head]
+            head += 1
+            for off in offsets:
+                j = i + off
+                if passable[j] and stamp[j] != gen:
+                    stamp[j] = gen
+                    parent[j] = i
+                    if j == dst:
+                        self.expanded = head
+                        return self._trace(j, src)
+                    queue[tail] = j
+                    tail += 1
+        self.expanded = head
+        return []
+
+    def a_star(self, start, goal):
+        """A* with a Manhattan heuristic; the returned path excludes start."""
+        if not self.is_open(*goal):
+            return []
+        width = self.width
+        src = self.index(*start)
+        dst = self.index(*goal)
+        gx, gy = divmod(dst, width)
+        gen = self._next_generation()
+        passable, parent, cost, stamp, offsets = self.passable, self.parent, self.cost, self.stamp, self.offsets
+        stamp[src] = gen
+        cost[src] = 0
+        open_set = [(0, src)]
+        expanded = 0
+        while open_set:
+            i = heapq.heappop(open_set)[1]
+            expanded += 1
+            if i == dst:
+                self.expanded = expanded
+                if i == src:
+                    return []
+                return self._trace(i, src)[1:]
+            g = cost[i] + 1
+            for off in offsets:
+                j = i + off
+                if passable[j] and (stamp[j] != gen or g < cost[j]):
+                    stamp[j] = gen
+                    cost[j] = g
+                    parent[j] = i
+                    x, y = divmod(j, width)
+                    heapq.heappush(open_set, (g + abs(x - gx) + abs(y - gy), j))
+        self.expanded = expanded
+        return []
+
+    def _build_jump_tables(self):
+        # For every cell, the next cell in each direction where a straight scan has to stop
+        w = self.width
+        open_ = np.frombuffer(self.passable, dtype=np.uint8).reshape(w, w).astype(bool)
+        forced_r = np.zeros_like(open_)
+        forced_l = np.zeros_like(open_)
+        forced_r[1:-1, 1:] = open_[1:-1, 1:] & ((open_[:-2, 1:] & ~open_[:-2, :-1]) | (open_[2:, 1:] & ~open_[2:, :-1]))
+        forced_l[1:-1, :-1] = open_[1:-1, :-1] & ((open_[:-2, :-1] & ~open_[:-2, 1:]) | (open_[2:, :-1] & ~open_[2:, 1:]))
+        lines = np.arange(w, dtype=np.int32)
+        base = lines[:, None] * w
+
+        right = np.full((w, w), w - 1, dtype=np.int32)
+        right[:, :-1] = np.minimum.accumulate(np.where(~open_ | forced_r, lines, w - 1)[:, ::-1], axis=1)[:, ::-1][:, 1:]
+        left = np.zeros((w, w), dtype=np.int32)
+        left[:, 1:] = np.maximum.accumulate(np.where(~open_ | forced_l, lines, 0), axis=1)[:, :-1]
+        row_hit = open_ & (np.take_along_axis(open_, right, 1) | np.take_along_axis(open_, left, 1))
+
+        stop = ~open_ | row_hit
+        down = np.full((w, w), w - 1, dtype=np.int32)
+        down[:-1, :] = np.minimum.accumulate(np.where(stop, lines[:, None], w - 1)[::-1, :], axis=0)[::-1, :][1:, :]
+        up = np.zeros((w, w), dtype=np.int32)
+        up[1:, :] = np.maximum.accumulate(np.where(stop, lines[:, None], 0), axis=0)[:-1, :]
+
+        self.jump_right = memoryview((base + right).ravel())
+        self.jump_left = memoryview((base + left).ravel())
+        self.jump_down = memoryview((down * w + lines[None, :]).ravel())
+        self.jump_up = memoryview((up * w + lines[None, :]).ravel())
+        self.jump_dirty = False
+
+    def _jump_h(self, i, d, dst):
+        # Goal, next cell with a forced vertical neighbour, or -1 at a wall
+        k = self.jump_right[i] if d > 0 else self.jump_left[i]
+        if dst // self.width == i // self.width and (i < dst <= k if d > 0 else k <= dst < i):
+            return dst
+        return k if self.passable[k] else -1
+
+    def _jump_v(self, i, v, dst):
+        # Goal, next cell from which a row scan finds a jump point, or -1 at a wall
+        w = self.width
+        k = self.jump_down[i] if v > 0 else self.jump_up[i]
+        col = i % w
+        if dst % w == col and (i < dst <= k if v > 0 else k <= dst < i):
+            return dst
+        # Row scans are tabled without the goal, so check the goal's row separately
+        row, goal_row = i // w, dst // w
+        if (row < goal_row < k // w) if v > 0 else (k // w < goal_row < row):
+            c = goal_row * w + col
+            if (c < dst <= self.jump_right[c]) or (self.jump_left[c] <= dst < c):
+                return c
+        return k if self.passable[k] else -1
+
+    def jps(self, start, goal):
+        """Jump point search for the 4-connected grid; same result shape and length as bfs().
+
+        Canonical paths go vertically first and turn into a row only where a
+        row scan finds something, so A* only queues jump points: the goal,
+        cells with forced neighbours, and the column cells leading to them.
+        Each jump is one lookup in tables built with NumPy on first use after
+        the grid changes. ``expanded`` counts jump points popped.
+        """
+        if self.jump_dirty:
+            self._build_jump_tables()
+        if start == goal:
+            self.expanded = 0
+            return [start]
+        if not self.is_open(*goal) or not self.is_open(*start):
+            self.expanded = 0
+            return []
+        width = self.width
+        src = self.index(*start)
+        dst = self.index(*goal)
+        gx, gy = divmod(dst, width)
+        gen = self._next_generation()
+        passable, parent, cost, stamp = self.passable, self.parent, self.cost, self.stamp
+        stamp[src] = gen
+        cost[src] = 0
+        parent[src] = src
+        open_set = [(0, 0, src)]
+        expanded = 0
+        while open_set:
+            f, h, i = heapq.heappop(open_set)
+            if f > cost[i] + h:
+                continue
+            x, y = divmod(i, width)
+            expanded += 1
+            if i == dst:
+                break
+            step = i - parent[i]
+            if step == 0:
+                jumps = (self._jump_v(i, -width, dst), self._jump_v(i, width, dst), self._jump_h(i, -1, dst), self._jump_h(i, 1, dst))
+            elif abs(step) >= width:
+                v = width if step > 0 else -width
+                jumps = (self._jump_v(i, v, dst), self._jump_h(i, -1, dst), self._jump_h(i, 1, dst))
+            else:
+                d = 1 if step > 0 else -1
+                jumps = [self._jump_h(i, d, dst)]
+                for v in (-width, width):
+                    if passable[i + v] and not passable[i + v - d]:
+                        jumps.append(self._jump_v(i, v, dst))
+            for j in jumps:
+                if j < 0:
+                    continue
+                jx, jy = divmod(j, width)
+                g = cost[i] + abs(jx - x) + abs(jy - y)
+                if stamp[j] != gen or g < cost[j]:
+                    stamp[j] = gen
+                    cost[j] = g
+                    parent[j] = i
+                    h = abs(jx - gx) + abs(jy - gy)
+                    # Among equal f, the point nearest the goal first: open maps are full of ties
+                    heapq.heappush(open_set, (g + h, h, j))
+        self.expanded = expanded
+        if stamp[dst] != gen:
+            return []
+        # Jump points are joined by straight runs; fill the cells in between
+        points = [dst]
+        while points[-1] != src:
+            points.append(parent[points[-1]])
+        points.reverse()
+        cells = [src]
+        for a, b in zip(points, points[1:]):
+            step = (1 if b > a else -1) * (width if abs(b - a) >= width else 1)
+            cells.extend(range(a + step, b + step, step))
+        return [self.cell(i) for i in cells]
+
+    def nearest_open(self, target):
+        """Open cell closest to target by Manhattan distance, ties broken in row-major order."""
+        x, y = target
+        for d in range(2 * self.size):
+            found = []
+            for dx in range(-d, d + 1):
+                dy = d - abs(dx)
+                if self.is_open(x + dx, y + dy):
+                    found.append((x + dx, y + dy))
+                if dy and self.is_open(x + dx, y - dy):
+                    found.append((x + dx, y - dy))
+            if found:
+                return min(found)
+        return None
+
+
+def component_labels(open_cells):
+    """Label the 4-connected components of a boolean array, -1 on blocked cells.
+
+    Horizontal runs of open cells are labelled in one cumsum, then the runs
+    are merged along vertical edges by a union-find applied to every edge at
+    once: each round hooks the larger root of every unmerged edge onto the
+    smaller one and pointer-jumps until all runs point at a root. Random maps
+    settle in a handful of rounds, all vectorized.
+    """
+    rows, cols = open_cells.shape
+    if not open_cells.any():
+        return np.full((rows, cols), -1, dtype=np.int32)
+    starts = open_cells.copy()
+    starts[:, 1:] &= ~open_cells[:, :-1]
+    runs = np.cumsum(starts, axis=None, dtype=np.int32).reshape(rows, cols) - 1
+    down = open_cells[:-1, :] & open_cells[1:, :]
+    u = runs[:-1, :][down]
+    v = runs[1:, :][down]
+    parent = np.arange(runs[-1, -1] + 1, dtype=np.int32)
+    while u.size:
+        pu = parent[u]
+        pv = parent[v]
+        unmerged = pu != pv
+        u, v, pu, pv = u[unmerged], v[unmerged], pu[unmerged], pv[unmerged]
+        if not u.size:
+            break
+        parent[np.maximum(pu, pv)] = np.minimum(pu, pv)
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    labels = parent[runs]
+    labels[~open_cells] = -1
+    return labels
+
+
+def multi_source_bfs(passable, width, sources, limit=None):
+    """BFS distances from the nearest of many sources, all agents' searches in one pass.
+
+    ``passable`` is a flat boolean array of a grid padded by one blocked cell
+    on every side (``width`` cells per row) and ``sources`` flat indices into
+    it. Each ring is expanded as one NumPy operation over the whole
+    frontier, so the cost is O(V) array work plus a small constant per
+    ring. Cells not reached (or beyond ``limit``) get -1.
+    """
+    dist = np.full(passable.size, -1, dtype=np.int32)
+    # Scratch for dropping duplicate cells without sorting: the last writer of a cell keeps it
+    writer = np.empty(passable.size, dtype=np.int64)
+    frontier = np.unique(sources[passable[sources]])
+    dist[frontier] = 0
+    offsets = np.array((-width, width, -1, 1))
+    d = 0
+    while frontier.size and (limit is None or d < limit):
+        d += 1
+        around = (frontier[:, None] + offsets).ravel()
+        around = around[passable[around] & (dist[around] < 0)]
+        order = np.arange(around.size)
+        writer[around] = order
+        frontier = around[writer[around] == order]
+        dist[frontier] = d
+    return dist
+
+
+_shared = {}
+
+
+def pathfinder_for(grid):
+    # One loaded pathfinder per grid size for callers that only hold a raw grid
+    size = len(grid)
+    pf = _shared.get(size)
+    if pf is None:
+        pf = _shared[size] = GridPathfinder(size)
+    pf.load(grid)
+    return pf
+
+
+def bfs_path(start, target, grid):
+    return pathfinder_for(grid).bfs(start, target)
+
+
+class PursuitField:
+    """Distance field toward a moving target, repaired instead of re-searched.
+
+    The field holds exact BFS distances from an anchor cell (the target's
+    position at the last rebuild), expanded only until the pursuer's cell is
+    settled. As the target moves one cell at a time its trail is appended to
+    the anchor, so the pursuer walks down the gradient to the trail and then
+    along it. The field is rebuilt only when that route could be more than
+    ``1 + slack`` times the true distance, judged against a lower bound from
+    the triangle inequality and the Manhattan distance; slack=0 rebuilds on
+    every move and gives exact shortest paths. A rebuild costs the cells
+    within the chase distance d and happens every O(slack*d) moves, so the
+    amortized cost per move depends on d, not on map size.
+
+    Routes depend on the field's history, which save() captures as the
+    trail and the pursuer's cell at the last rebuild; load() puts it back
+    and the field is rebuilt from it on the next route.
+    """
+
+    def __init__(self, pathfinder, slack=0.25):
+        self.pf = pathfinder
+        cells = len(pathfinder.passable)
+        self.dist = [0] * cells
+        self.stamp = [0] * cells
+        self.queue = [0] * cells
+        self.generation = 0
+        self.slack = slack
+        self.trail = []
+        self.trail_index = {}
+        self.origin = None
+        self.saved = None
+        self.reachable = False
+        self.dirty = True
+        self.rebuilds = 0
+        self.expanded = 0
+
+    def invalidate(self):
+        self.dirty = True
+        self.saved = None
+
+    def set_cell(self, x, y, value):
+        i = self.pf.index(x, y)
+        was = self.pf.passable[i]
+        self.pf.set_cell(x, y, value)
+        if self.pf.passable[i] != was:
+            self.invalidate()
+
+    def save(self):
+        """What the next routes depend on: O(trail), never the distance arrays."""
+        if self.dirty:
+            return None
+        return self.saved or (tuple(self.trail), self.origin)
+
+    def load(self, saved):
+        self.dirty = saved is None
+        self.saved = saved
+
+    def _resume(self):
+        # Rebuilding from the same anchor and pursuer cell gives back the same field
+        trail, origin = self.saved
+        self.saved = None
+        self._rebuild(trail[0], origin)
+        self.trail = list(trail)
+        self.trail_index = {t: k for k, t in enumerate(trail)}
+
+    def _move_target(self, t):
+        trail = self.trail
+        if not trail or trail[-1] == t:
+            return
+        pos = self.trail_index.get(t)
+        if pos is not None:
+            # Target doubled back: drop the loop from the trail
+            for i in trail[pos + 1:]:
+                del self.trail_index[i]
+            del trail[pos + 1:]
+        elif abs(t - trail[-1]) in (1, self.pf.width):
+            self.trail_index[t] = len(trail)
+            trail.append(t)
+        else:
+            self.dirty = True
+
+    def _rebuild(self, t, p):
+        self.generation += 1
+        gen = self.generation
+        passable, dist, stamp, queue, offsets = self.pf.passable, self.dist, self.stamp, self.queue, self.pf.offsets
+        stamp[t] = gen
+        dist[t] = 0
+        queue[0] = t
+        head, tail = 0, 1
+        found = t == p
+        while head < tail and not found:
+            i = queue[head]
+            head += 1
+            d = dist[i] + 1
+            for off in offsets:
+                j = i + off
+                if passable[j] and stamp[j] != gen:
+                    stamp[j] = gen
+                    dist[j] = d
+                    if j == p:
+                        found = True
+                        break
+                    queue[tail] = j
+                    tail += 1
+        self.trail = [t]
+        self.trail_index = {t: 0}
+        self.origin = p
+        self.reachable = found
+        self.dirty = False
+        self.rebuilds += 1
+        self.expanded = tail
+
+    def _good_enough(self, p, start, target):
+        k = len(self.trail) - 1
+        pos = self.trail_index.get(p)
+        if pos is not None:
+            length = k - pos
+            lower = 0
+        elif self.stamp[p] == self.generation:
+            length = self.dist[p] + k
+            lower = self.dist[p] - k
+        else:
+            return False
+        lower = max(lower, abs(start[0] - target[0]) + abs(start[1] - target[1]))
+        return length <= (1 + self.slack) * lower
+
+    def route(self, start, target):
+        """Route from start to target inclusive, or None if target is unreachable.
+
+        start must be open and target an open cell; only the first step is
+        needed to move, the rest of the list is for display.
+        """
+        pf = self.pf
+        t = pf.index(*target)
+        p = pf.index(*start)
+        if self.saved is not None and not self.dirty:
+            self._resume()
+        if not self.dirty:
+            self._move_target(t)
+        if self.dirty or not self._good_enough(p, start, target):
+            self._rebuild(t, p)
+        if not self.reachable:
+            return None
+
+        dist, stamp, gen, offsets, trail_index = self.dist, self.stamp, self.generation, pf.offsets, self.trail_index
+        cells = [p]
+        i = p
+        while i not in trail_index:
+            d = dist[i] - 1
+            for off in offsets:
+                j = i + off
+                if stamp[j] == gen and dist[j] == d:
+                    i = j
+                    break
+            cells.append(i)
+        cells.extend(self.trail[trail_index[i] + 1:])
+        return [pf.cell(i) for i in cells]
+
+
+class ClusterGraph:
+    """HPA*-style search over square clusters of the grid, exact rather than approximate.
+
+    Every open cell on a cluster's edge with an open neighbour across it is
+    an abstract node; nodes in the same cluster are joined by their
+    shortest distance inside the cluster and nodes facing each other across
+    an edge by 1. Any shortest path splits into such pieces, so A* on this
+    graph finds true shortest lengths while expanding only border cells.
+    A cluster's distances are found by bounded BFS the first time a search
+    enters it and kept until a cell in or on the edge of it changes.
+    ``expanded`` counts abstract nodes popped and ``scanned`` the cells the
+    bounded searches visited.
+    """
+
+    def __init__(self, pathfinder, cluster=16):
+        self.pf = pathfinder
+        self.cluster = cluster
+        self.intra = {}
+        self.expanded = 0
+        self.scanned = 0
+
+    def invalidate(self):
+        self.intra.clear()
+
+    def set_cell(self, x, y, value):
+        self.pf.set_cell(x, y, value)
+        c = self.cluster
+        for dx, dy in ((0, 0), (-1, 0), (1, 0), (0, -1), (0, 1)):
+            self.intra.pop(((x + dx) // c, (y + dy) // c), None)
+
+    def _cluster_of(self, i):
+        x, y = divmod(i, self.pf.width)
+        return (x - 1) // self.cluster, (y - 1) // self.cluster
+
+    def _bounds(self, key):
+        c, w = self.cluster, self.pf.width
+        x0, y0 = key[0] * c + 1, key[1] * c + 1
+        return x0, min(x0 + c, w - 1), y0, min(y0 + c, w - 1)
+
+    def _is_border(self, i, key):
+        passable = self.pf.passable
+        return any(passable[i + off] and self._cluster_of(i + off) != key for off in self.pf.offsets)
+
+    def _local_bfs(self, src, key):
+        # Distances and parents from src to every cell of its cluster it can reach without leaving it
+        pf, w = self.pf, self.pf.width
+        x0, x1, y0, y1 = self._bounds(key)
+        passable, offsets = pf.passable, pf.offsets
+        dist = {src: 0}
+        parent = {src: src}
+        frontier = [src]
+        while frontier:
+            nxt = []
+            for i in frontier:
+                d = dist[i] + 1
+                for off in offsets:
+                    j = i + off
+                    if passable[j] and j not in dist and x0 <= j // w < x1 and y0 <= j % w < y1:
+                        dist[j] = d
+                        parent[j] = i
+                        nxt.append(j)
+            frontier = nxt
+        self.scanned += len(dist)
+        return dist, parent
+
+    def _edges(self, i):
+        key = self._cluster_of(i)
+        table = self.intra.setdefault(key, {})
+        edges = table.get(i)
+        if edges is None:
+            dist, _ = self._local_bfs(i, key)
+            edges = [(j, d) for j, d in dist.items() if j != i and self._is_border(j, key)]
+            passable = self.pf.passable
+            edges.extend((i + off, 1) for off in self.pf.offsets if passable[i + off] and self._cluster_of(i + off) != key)
+            table[i] = edges
+        return edges
+
+    def path(self, start, goal):
+        """Shortest path from start to goal inclusive, or [] if unreachable; same length as bfs()."""
+        pf = self.pf
+        self.expanded = 0
+        self.scanned = 0
+        if start == goal:
+            return [start]
+        if not pf.is_open(*start) or not pf.is_open(*goal):
+            return []
+        w = pf.width
+        src, dst = pf.index(*start), pf.index(*goal)
+        src_key, dst_key = self._cluster_of(src), self._cluster_of(dst)
+        gx, gy = divmod(dst, w)
+
+        dist, _ = self._local_bfs(src, src_key)
+        start_edges = [(j, d) for j, d in dist.items() if j != src and (j == dst or self._is_border(j, src_key))]
+        passable = pf.passable
+        start_edges.extend((src + off, 1) for off in pf.offsets if passable[src + off] and self._cluster_of(src + off) != src_key)
+        dist, _ = self._local_bfs(dst, dst_key)
+        goal_edges = {j: d for j, d in dist.items() if self._is_border(j, dst_key)}
+
+        cost = {src: 0}
+        parent = {src: src}
+        open_set = [(0, 0, src)]
+        while open_set:
+            f, h, i = heapq.heappop(open_set)
+            if f > cost[i] + h:
+                continue
+            self.expanded += 1
+            if i == dst:
+                break
+            edges = start_edges if i == src else self._edges(i)
+            if i in goal_edges:
+                edges = edges + [(dst, goal_edges[i])]
+            g0 = cost[i]
+            for j, d in edges:
+                g = g0 + d
+                if g < cost.get(j, g + 1):
+                    cost[j] = g
+                    parent[j] = i
+                    jx, jy = divmod(j, w)
+                    h = abs(jx - gx) + abs(jy - gy)
+                    heapq.heappush(open_set, (g + h, h, j))
+        if dst not in parent:
+            return []
+
+        nodes = [dst]
+        while nodes[-1] != src:
+            nodes.append(parent[nodes[-1]])
+        nodes.reverse()
+        cells = [src]
+        for a, b in zip(nodes, nodes[1:]):
+            key = self._cluster_of(a)
+            if self._cluster_of(b) != key:
+                cells.append(b)
+                continue
+            # Refine the in-cluster hop back into cells
+            _, local = self._local_bfs(a, key)
+            piece = [b]
+            while piece[-1] != a:
+                piece.append(local[piece[-1]])
+            cells.extend(reversed(piece[:-1]))
+        return [pf.cell(i) for i in cells]
@@ -0,0 +1,51 @@
+import numpy as np
+
+# A pickup layer is an int8 array the size of the grid: 0 is an empty cell, otherwise the kind's index + 1
+PICKUP_KINDS = ("boost", "time", "bonus")
+# Seconds a "time" pickup adds to the limit, and points a "bonus" pickup adds to the capture score
+TIME_BONUS = 5.0
+SCORE_BONUS = 500
+# Give up on a respawn after this many cells turned out to be taken
+SPAWN_TRIES = 64
+
+
+def pickup_code(kind):
+    return PICKUP_KINDS.index(kind) + 1
+
+
+def pickup_counts(spec, road_count):
+    """(code, count) per kind of a spec like {"boost": 3, "bonus": 0.02}: ints are counts, floats a share of the road cells."""
+    return [(pickup_code(kind), int(amount * road_count) if isinstance(amount, float) else amount)
+            for kind, amount in spec.items()]
+
+
+def place_pickups(grid, rng, spec):
+    """A pickup layer for grid with items on distinct road cells, never on the two corners the characters start on."""
+    size = len(grid)
+    road_cells = np.flatnonzero(grid.ravel() == 0)
+    road_cells = road_cells[(road_cells != 0) & (road_cells != size * size - 1)]
+    counts = pickup_counts(spec, len(road_cells))
+    picks = road_cells[rng.sample(range(len(road_cells)), min(sum(count for _, count in counts), len(road_cells)))]
+    layer = np.zeros((size, size), dtype=np.int8)
+    start = 0
+    for code, count in counts:
+        layer.ravel()[picks[start:start + count]] = code
+        start += count
+    return layer
+
+
+def spawn_cell(grid, layer, rng, taken=()):
+    # Rejection-sample a free road cell: O(1) expected on any map that isn't nearly full
+    size = len(grid)
+    for _ in range(SPAWN_TRIES):
+        cell = (rng.randrange(size), rng.randrange(size))
+        if grid[cell] == 0 and not layer[cell] and cell not in taken:
+            return cell
+    return None
+
+
+def visible_pickups(layer, rows, cols):
+    """Rows, columns and codes of the items in the top-left rows x cols window of a layer."""
+    window = layer[:rows, :cols]
+    xs, ys = np.nonzero(window)
+    return xs, ys, window[xs, ys]
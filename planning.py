@@ -0,0 +1,97 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from pathfinding import ClusterGraph, GridPathfinder, PursuitField
+from simulation import manhattan_distance, route_police
+
+
+class AsyncRoutePlanner:
+    """Police routes searched on a worker thread so a move tick never waits on them.
+
+    Set as ``state.route_planner``. Each route(state) call hands back the
+    last finished path, trimmed to where the police stands, and queues a
+    search from the cell the police will step to next towards the thief's
+    current cell. Once the thief is on or next to the police the route is
+    known without a search and is returned directly. A queued search the
+    thief has since moved away from is cancelled; one already running
+    finishes and is used only if nothing newer has arrived. The worker
+    keeps its own pathfinder and pursuit field, loaded from a copy of the
+    grid taken once per grid version.
+    """
+
+    def __init__(self, executor=None):
+        self.owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="planner")
+        self.ids = itertools.count()
+        self.inflight = []
+        self.key = None
+        self.path = []
+        self.path_id = -1
+        self.snapshot = (None, None)
+        self.submitted = 0
+        self.cancelled = 0
+        self.stale = 0
+        # Worker-thread state; only touched inside _plan
+        self.pathfinder = None
+        self.pursuit = None
+        self.clusters = None
+        self.loaded_version = None
+
+    def _plan(self, snapshot, start, thief_pos, mode):
+        version, grid = snapshot
+        if version != self.loaded_version:
+            if self.pathfinder is None or self.pathfinder.size != len(grid):
+                self.pathfinder = GridPathfinder(len(grid))
+                self.pursuit = PursuitField(self.pathfinder)
+                self.clusters = ClusterGraph(self.pathfinder)
+            self.pathfinder.load(grid)
+            self.pursuit.invalidate()
+            self.clusters.invalidate()
+            self.loaded_version = version
+        return route_police(self.pathfinder, self.pursuit, start, thief_pos, mode, self.clusters)
+
+    def _collect(self):
+        pending = []
+        for request_id, version, future in self.inflight:
+            if not future.done():
+                pending.append((request_id, version, future))
+            elif future.cancelled() or request_id < self.path_id or version != self.snapshot[0]:
+                self.stale += not future.cancelled()
+            else:
+                self.path, self.path_id = future.result(), request_id
+        self.inflight = pending
+
+    def _follow(self, pos):
+        if pos in self.path:
+            return self.path[self.path.index(pos):]
+        return [pos]
+
+    def route(self, state):
+        if state.grid_version != self.snapshot[0]:
+            self.snapshot = (state.grid_version, state.grid.copy())
+            self.path, self.path_id = [], next(self.ids)
+        self._collect()
+        gap = manhattan_distance(state.police_pos, state.thief_pos)
+        if gap <= 1 and not state.grid[state.thief_pos]:
+            # Caught or one step away: no search needed, and a finished one may predate the thief's last step
+            return [state.police_pos, state.thief_pos][:gap + 1]
+        path = self._follow(state.police_pos)
+
+        start = path[1] if len(path) > 1 else state.police_pos
+        key = (start, state.thief_pos, state.grid_version, state.police_planner)
+        if key != self.key:
+            self.key = key
+            for _, _, future in self.inflight:
+                self.cancelled += future.cancel()
+            future = self.executor.submit(self._plan, self.snapshot, start, state.thief_pos, state.police_planner)
+            self.inflight.append((next(self.ids), state.grid_version, future))
+            self.submitted += 1
+        return path
+
+    def close(self):
+        # Every queued search is in inflight, so cancelling them by hand leaves the worker nothing to start
+        for _, _, future in self.inflight:
+            future.cancel()
+        self.inflight = []
+        if self.owns_executor:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,74 @@
+import pygame
+
+
+class DirtyRegions:
+    """Presents only the parts of the window that changed since the last frame.
+
+    A frame starts with begin(partial). On a partial frame the screen is
+    not cleared: restore() paints the background back over everything the
+    previous frame drew, drawing code reports each rect it touches with
+    add(), and present() calls display.update() on last frame's rects plus
+    this frame's. Everything else on screen is left as it was. A full frame
+    (state changes, overlays, shake, a rebuilt background) is redrawn and
+    flipped as a whole. Its rects are still recorded so the next partial
+    frame can erase them. When the changed area covers more than
+    ``max_fraction`` of the window, a full flip is cheaper than the list.
+    """
+
+    def __init__(self, size, max_fraction=0.5):
+        self.bounds = pygame.Rect((0, 0), size)
+        self.area = size[0] * size[1]
+        self.max_fraction = max_fraction
+        self.active = False
+        self.partial = False
+        self.rects = []
+        self.previous = []
+        self.forced = True
+        self.full_frames = 0
+        self.partial_frames = 0
+        self.updated_area = 0
+
+    def begin(self, partial):
+        self.active = True
+        self.partial = partial and not self.forced
+        self.forced = False
+        self.previous, self.rects = self.rects, []
+        return self.partial
+
+    def invalidate(self):
+        """Make the next frame a full one (window exposed, background rebuilt, ...)."""
+        self.forced = True
+
+    def add(self, rect):
+        # Clipped to the window: a blit with an area hanging off the background would land shifted
+        if self.active and rect:
+            rect = rect.clip(self.bounds)
+            if rect:
+                self.rects.append(rect)
+        return rect
+
+    def restore(self, surface, background, fill):
+        for rect in self.previous:
+            surface.fill(fill, rect)
+            surface.blit(background, rect, rect)
+
+    def present(self):
+        if self.partial:
+            rects = self.previous + self.rects
+            area = sum(rect.width * rect.height for rect in rects)
+            if area <= self.area * self.max_fraction:
+                pygame.display.update(rects)
+                self.partial_frames += 1
+                self.updated_area += area
+                return
+        pygame.display.flip()
+        self.full_frames += 1
+        self.updated_area += self.area
+
+    def stats(self):
+        frames = self.full_frames + self.partial_frames
+        return {
+            "full_frames": self.full_frames,
+            "partial_frames": self.partial_frames,
+            "updated_fraction": self.updated_area / (self.area * frames) if frames else 0.0,
+        }
@@ -0,0 +1,134 @@
+import csv
+import gc
+import json
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+STAGES = ("events", "thief_ai", "police_ai", "draw_grid", "draw_entities", "flip")
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("totals", "name", "start")
+
+    def __init__(self, totals, name):
+        self.totals = totals
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.totals[self.name] += time.perf_counter() - self.start
+        return False
+
+
+class FrameProfiler:
+    """Per-stage frame timings with rolling percentiles and optional export.
+
+    Wrap work in ``with profiler.stage(name):`` and call begin_frame() /
+    end_frame() around each frame. While disabled, stage() hands back a shared
+    no-op context manager and the frame calls return immediately.
+    """
+
+    def __init__(self, stages=STAGES, window=600, enabled=False, max_rows=216000):
+        self.stages = tuple(stages)
+        self.enabled = enabled
+        self.totals = dict.fromkeys(self.stages, 0.0)
+        self.timers = {name: _Stage(self.totals, name) for name in self.stages}
+        self.windows = {name: deque(maxlen=window) for name in self.stages + ("frame",)}
+        self.alloc_window = deque(maxlen=window)
+        self.rows = []
+        self.max_rows = max_rows
+        self.frame = 0
+        self.frame_start = None
+        self.blocks = 0
+        self.collections = 0
+        self._summary = None
+        self._summary_frame = -1
+
+    def stage(self, name):
+        if not self.enabled:
+            return NULL_STAGE
+        return self.timers[name]
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_start = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        for name in self.stages:
+            self.totals[name] = 0.0
+        self.blocks = sys.getallocatedblocks()
+        self.collections = sum(stat["collections"] for stat in gc.get_stats())
+        self.frame_start = time.perf_counter()
+
+    def end_frame(self):
+        if not self.enabled or self.frame_start is None:
+            return
+        frame = time.perf_counter() - self.frame_start
+        blocks = sys.getallocatedblocks() - self.blocks
+        collections = sum(stat["collections"] for stat in gc.get_stats()) - self.collections
+        self.windows["frame"].append(frame)
+        for name in self.stages:
+            self.windows[name].append(self.totals[name])
+        self.alloc_window.append(blocks)
+        if len(self.rows) < self.max_rows:
+            self.rows.append((self.frame, frame, *(self.totals[name] for name in self.stages), blocks, collections))
+        self.frame += 1
+
+    def summary(self, every=30):
+        """Rolling p50/p95/p99 in ms per stage, recomputed at most every `every` frames."""
+        if self._summary is not None and self.frame - self._summary_frame < every:
+            return self._summary
+        result = {}
+        for name, window in self.windows.items():
+            if window:
+                p50, p95, p99 = np.percentile(np.fromiter(window, float, len(window)) * 1000, (50, 95, 99))
+                result[name] = (p50, p95, p99)
+        self._summary = result
+        self._summary_frame = self.frame
+        return result
+
+    def histogram(self, bin_ms=2, bins=12):
+        counts = [0] * bins
+        for frame in self.windows["frame"]:
+            counts[min(int(frame * 1000 / bin_ms), bins - 1)] += 1
+        return counts
+
+    def allocations(self):
+        window = self.alloc_window
+        return sum(window) / len(window) if window else 0.0
+
+    def export(self, path):
+        header = ["frame", "frame_ms"] + [f"{name}_ms" for name in self.stages] + ["alloc_blocks", "gc_collections"]
+        rows = [[row[0]] + [round(value * 1000, 4) for value in row[1:-2]] + list(row[-2:]) for row in self.rows]
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"columns": header, "rows": rows, "summary": self.summary(every=0)}, f)
+        else:
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+
+
+# Shared disabled instance for code that may or may not be profiled
+NULL_PROFILER = FrameProfiler(enabled=False)
@@ -0,0 +1,77 @@
+from collections import deque
+
+# Best first. rain: drops drawn; particles: live particle cap; glow: translucent glows behind text and
+# buttons; pulse: animated power-ups and highscore glow; shake: screen shake on capture
+TIERS = (
+    {"name": "High", "rain": 100, "particles": 5000, "glow": True, "pulse": True, "shake": True},
+    {"name": "Medium", "rain": 60, "particles": 1500, "glow": True, "pulse": False, "shake": True},
+    {"name": "Low", "rain": 25, "particles": 400, "glow": False, "pulse": False, "shake": True},
+    {"name": "Minimal", "rain": 0, "particles": 100, "glow": False, "pulse": False, "shake": False},
+)
+TIER_NAMES = tuple(tier["name"] for tier in TIERS)
+
+
+class QualityGovernor:
+    """Steps visual quality down when frames run over budget and back up when there is room.
+
+    Feed update() the busy time of every frame (work only, not the wait for
+    the frame cap). Once ``window`` frames have been measured at the current
+    tier, a mean above ``down`` x budget drops one tier and a mean under
+    ``up`` x budget raises one. The gap between the two thresholds and the
+    fresh window after every change keep tiers from flapping; a tier that
+    had to be left again within one window of being entered doubles how
+    many frames the next step up waits for, up to ``max_hold``. A ``pinned``
+    tier name fixes the tier; an unknown one is reported and ignored.
+    """
+
+    def __init__(self, budget, window=60, down=0.85, up=0.45, max_hold=3600, pinned=None, telemetry=None):
+        self.budget = budget
+        self.window = window
+        self.down = down
+        self.up = up
+        self.max_hold = max_hold
+        self.samples = deque(maxlen=window)
+        self.total = 0.0
+        if pinned is not None and pinned not in TIER_NAMES:
+            if telemetry:
+                telemetry.warning("unknown_quality_tier", tier=pinned, tiers="/".join(TIER_NAMES))
+            pinned = None
+        self.index = 0 if pinned is None else TIER_NAMES.index(pinned)
+        self.pinned = pinned is not None
+        self.hold = window
+        self.frames = 0
+        self.raised_at = None
+        self.changed_at = 0
+        self.changes = 0
+        self.mean = 0.0
+
+    @property
+    def tier(self):
+        return TIERS[self.index]
+
+    def update(self, seconds):
+        """Record one frame; returns the new tier when it changed, otherwise None."""
+        if len(self.samples) == self.window:
+            self.total -= self.samples[0]
+        self.samples.append(seconds)
+        self.total += seconds
+        self.frames += 1
+        if self.pinned or len(self.samples) < self.window:
+            return None
+        mean = self.mean = self.total / self.window
+        if mean > self.budget * self.down and self.index < len(TIERS) - 1:
+            if self.raised_at is not None and self.frames - self.raised_at <= self.window:
+                self.hold = min(self.hold * 2, self.max_hold)
+            return self._change(self.index + 1)
+        if mean < self.budget * self.up and self.index > 0 and self.frames - self.changed_at >= self.hold:
+            self.raised_at = self.frames
+            return self._change(self.index - 1)
+        return None
+
+    def _change(self, index):
+        self.index = index
+        self.changed_at = self.frames
+        self.samples.clear()
+        self.total = 0.0
+        self.changes += 1
+        return self.tier
@@ -0,0 +1,290 @@
+"""Record chases compactly and play them back.
+
+    python replay.py replay-20260101-120000.ctr               # headless, as fast as it goes
+    python replay.py replay-20260101-120000.ctr --verify      # also re-run the AI and list disagreements
+    python replay.py replay-20260101-120000.ctr --render --speed 4
+
+A replay holds the episode's seeds and settings plus only what the
+simulation can't recompute: the player's inputs (tick gap and action) and
+one byte per move saying where the thief and the police stepped, since the
+Expert search and the threaded police planner depend on timing. Grids,
+power-ups, grid resets and the capture are rebuilt by the simulation, so a
+minute of play is a few hundred bytes.
+"""
+import argparse
+import struct
+import sys
+import time
+import zlib
+
+from simulation import DIFFICULTIES, MOVES, POLICE_PLANNERS, TOGGLE_AUTO, GridPool, SimState, decide_thief_move, plan_police, step
+
+MAGIC = b"CTRP"
+VERSION = 1
+# magic, version, difficulty, planner, grid size, tick rate, episode seed, grid pool seed, grid index,
+# ticks, outcome, score, input count
+HEADER = struct.Struct("<4sBBBHHQQIIBII")
+ACTIONS = ("up", "down", "left", "right", TOGGLE_AUTO)
+OUTCOMES = (None, "caught", "timeout")
+# Move codes: an index into STEPS, or STAY; a police code of NO_PATH means the planner found nothing
+STEPS = tuple(MOVES.values())
+STAY = 4
+NO_PATH = 5
+
+
+def _step_code(old, new):
+    if old == new:
+        return STAY
+    return STEPS.index((new[0] - old[0], new[1] - old[1]))
+
+
+def _apply_code(pos, code):
+    if code >= STAY:
+        return pos
+    dx, dy = STEPS[code]
+    return pos[0] + dx, pos[1] + dy
+
+
+def _police_code(state, path):
+    if not path:
+        return NO_PATH
+    return STAY if len(path) == 1 else _step_code(state.police_pos, path[1])
+
+
+def _varint(value, out):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, i):
+    value = shift = 0
+    while True:
+        byte = data[i]
+        i += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, i
+        shift += 7
+
+
+class Replay:
+    def __init__(self, difficulty, police_planner, grid_size, tick_rate, seed, pool_seed, grid_index):
+        self.difficulty = difficulty
+        self.police_planner = police_planner
+        self.grid_size = grid_size
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.pool_seed = pool_seed
+        self.grid_index = grid_index
+        self.inputs = []
+        self.moves = bytearray()
+        self.ticks = 0
+        self.outcome = None
+        self.score = 0
+
+    def to_bytes(self):
+        body = bytearray()
+        last = 0
+        for tick, action in self.inputs:
+            _varint(tick - last, body)
+            body.append(action)
+            last = tick
+        body += self.moves
+        header = HEADER.pack(MAGIC, VERSION, DIFFICULTIES.index(self.difficulty), POLICE_PLANNERS.index(self.police_planner),
+                             self.grid_size, self.tick_rate, self.seed, self.pool_seed, self.grid_index,
+                             self.ticks, OUTCOMES.index(self.outcome), self.score, len(self.inputs))
+        return header + zlib.compress(bytes(body), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        (magic, version, difficulty, planner, grid_size, tick_rate, seed, pool_seed, grid_index,
+         ticks, outcome, score, count) = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"not a version {VERSION} replay")
+        replay = cls(DIFFICULTIES[difficulty], POLICE_PLANNERS[planner], grid_size, tick_rate, seed, pool_seed, grid_index)
+        replay.ticks, replay.outcome, replay.score = ticks, OUTCOMES[outcome], score
+        body = zlib.decompress(data[HEADER.size:])
+        i = tick = 0
+        for _ in range(count):
+            delta, i = _read_varint(body, i)
+            tick += delta
+            replay.inputs.append((tick, body[i]))
+            i += 1
+        replay.moves = bytearray(body[i:])
+        return replay
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """Tape for SimState.tape that runs the AI as usual and writes down what it did."""
+
+    def __init__(self, state, tick_rate):
+        if state.police_planner not in POLICE_PLANNERS:
+            raise ValueError(f"can't record police planner {state.police_planner!r}")
+        self.replay = Replay(state.difficulty, state.police_planner, state.grid_size, tick_rate,
+                             state.seed, state.grids.seed, state.grid_index)
+
+    def action(self, state, action):
+        self.replay.inputs.append((state.ticks, ACTIONS.index(action)))
+
+    def thief(self, state):
+        new_pos = decide_thief_move(state)
+        self.replay.moves.append(_step_code(state.thief_pos, new_pos) * 6 + NO_PATH)
+        return new_pos
+
+    def police(self, state):
+        path = plan_police(state)
+        self.replay.moves[-1] += _police_code(state, path) - NO_PATH
+        return path
+
+    def finish(self, state):
+        self.replay.ticks = state.ticks
+        self.replay.outcome = state.outcome
+        self.replay.score = state.score
+        return self.replay
+
+
+class Player:
+    """Tape for SimState.tape that replays recorded moves; with verify, also runs the AI and notes disagreements."""
+
+    def __init__(self, replay, verify=False):
+        self.moves = replay.moves
+        self.index = 0
+        self.verify = verify
+        self.mismatches = []
+
+    def action(self, state, action):
+        pass
+
+    def thief(self, state):
+        if self.index >= len(self.moves):
+            raise ValueError("replay ran out of recorded moves")
+        new_pos = _apply_code(state.thief_pos, self.moves[self.index] // 6)
+        self.index += 1
+        if self.verify:
+            planned = decide_thief_move(state)
+            if planned != new_pos:
+                self.mismatches.append((state.ticks, "thief", new_pos, planned))
+        return new_pos
+
+    def police(self, state):
+        code = self.moves[self.index - 1] % 6
+        if code == NO_PATH:
+            path = []
+        elif code == STAY:
+            path = [state.police_pos]
+        else:
+            path = [state.police_pos, _apply_code(state.police_pos, code)]
+        if self.verify:
+            planned = plan_police(state)
+            if _police_code(state, planned) != code:
+                self.mismatches.append((state.ticks, "police", path[1:2], planned[1:2]))
+        return path
+
+
+def start(replay, verify=False):
+    """A SimState at the recorded episode's first tick, driven by a Player tape."""
+    state = SimState(replay.difficulty, grid_size=replay.grid_size)
+    state.grids = GridPool(replay.grid_size, replay.pool_seed)
+    state.grids.next = replay.grid_index
+    state.police_planner = replay.police_planner
+    state.reset(replay.seed)
+    state.tape = Player(replay, verify)
+    return state
+
+
+def advance(state, inputs, dt):
+    # One recorded tick: the inputs made before it, then the tick itself
+    events = []
+    while inputs and inputs[-1][0] <= state.ticks:
+        events += step(state, ACTIONS[inputs.pop()[1]])
+    events += step(state, None, dt)
+    return events
+
+
+def play(replay, verify=False):
+    state = start(replay, verify)
+    inputs = replay.inputs[::-1]
+    dt = 1.0 / replay.tick_rate
+    while state.ticks < replay.ticks and not state.outcome:
+        advance(state, inputs, dt)
+    return state
+
+
+def render(replay, speed=1.0):
+    import pygame
+    import game
+
+    game.setup()
+    state = start(replay)
+    state.profiler = game.profiler
+    game.sim = state
+    game.grid_layer = None
+    game.game_state = "playing"
+    inputs = replay.inputs[::-1]
+    dt = 1.0 / replay.tick_rate
+    due = 0.0
+    while game.game_state == "playing" and state.ticks < replay.ticks:
+        game.profiler.begin_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                return state
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                game.profiler.toggle()
+        due += speed * replay.tick_rate / game.FPS
+        while due >= 1 and state.ticks < replay.ticks and not state.outcome:
+            due -= 1
+            game.prev_police_pos, game.prev_thief_pos = state.police_pos, state.thief_pos
+            game.handle_sim_events(advance(state, inputs, dt))
+        game.update_particles(1.0 / game.FPS)
+        game.draw_city_background()
+        with game.profiler.stage("draw_grid"):
+            game.draw_grid()
+        with game.profiler.stage("draw_entities"):
+            game.draw_entities(state.police_path)
+        with game.profiler.stage("flip"):
+            pygame.display.flip()
+        game.profiler.end_frame()
+        game.clock.tick(game.FPS)
+    pygame.quit()
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("replay")
+    parser.add_argument("--verify", action="store_true", help="re-run the AI at every move and report where it differs")
+    parser.add_argument("--render", action="store_true", help="show the chase in a window")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback multiplier when rendering (default 1)")
+    args = parser.parse_args(argv)
+
+    replay = Replay.load(args.replay)
+    print(f"{replay.difficulty}, {replay.grid_size}x{replay.grid_size}, seed {replay.seed}, {replay.ticks} ticks, "
+          f"{len(replay.inputs)} inputs, recorded {replay.outcome} score {replay.score}")
+    begin = time.perf_counter()
+    state = render(replay, args.speed) if args.render else play(replay, args.verify)
+    elapsed = time.perf_counter() - begin
+    print(f"replayed {state.ticks} ticks in {elapsed:.3f}s: {state.outcome} score {state.score}")
+    if state.tape.mismatches:
+        print(f"{len(state.tape.mismatches)} moves where the AI now decides differently:")
+        for tick, who, recorded, planned in state.tape.mismatches[:20]:
+            print(f"  tick {tick}: {who} recorded {recorded}, now {planned}")
+    if (state.ticks, state.outcome, state.score) != (replay.ticks, replay.outcome, replay.score):
+        print("MISMATCH: replay ended differently from the recording")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+import time
+from collections import deque
+
+
+class FixedStepScheduler:
+    """Fixed-timestep accumulator that decouples simulation ticks from frames.
+
+    Each frame call advance() with whether the simulation is running; it
+    measures the real time since the previous frame and returns how many
+    ticks of ``dt`` seconds are due. ``alpha`` is how far the current frame
+    sits between the last two ticks, for interpolating what is drawn.
+    """
+
+    def __init__(self, tick_rate, max_steps=8, window=240, clock=time.perf_counter):
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.clock = clock
+        self.accumulator = 0.0
+        self.frame_dt = 0.0
+        self.last = None
+        self.ticks = 0
+        self.dropped = 0.0
+        self.frame_times = deque(maxlen=window)
+        self.tick_times = deque(maxlen=window)
+
+    def advance(self, running=True):
+        now = self.clock()
+        self.frame_dt = 0.0 if self.last is None else now - self.last
+        self.last = now
+        self.frame_times.append(self.frame_dt)
+        if not running:
+            self.accumulator = 0.0
+            return 0
+        self.accumulator += self.frame_dt
+        budget = self.max_steps * self.dt
+        if self.accumulator > budget:
+            # Too far behind (stall, breakpoint, backgrounded tab): drop time instead of spiralling
+            self.dropped += self.accumulator - budget
+            self.accumulator = budget
+        steps = int(self.accumulator / self.dt)
+        self.accumulator -= steps * self.dt
+        self.ticks += steps
+        return steps
+
+    def record_tick(self, seconds):
+        self.tick_times.append(seconds)
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.last = None
+
+    @property
+    def alpha(self):
+        return self.accumulator / self.dt
+
+    def stats(self):
+        frames = [f for f in self.frame_times if f > 0] or [0.0]
+        ticks = list(self.tick_times) or [0.0]
+        mean_frame = sum(frames) / len(frames)
+        return {
+            "fps": 1.0 / mean_frame if mean_frame else 0.0,
+            "frame_ms": mean_frame * 1000,
+            "frame_max_ms": max(frames) * 1000,
+            "tick_ms": sum(ticks) / len(ticks) * 1000,
+            "tick_max_ms": max(ticks) * 1000,
+            "ticks": self.ticks,
+            "dropped_s": self.dropped,
+        }
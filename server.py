@@ -0,0 +1,359 @@
+"""Host many independent chases headless in one process, for networked or load-tested play.
+
+    python server.py                                  # TCP 127.0.0.1:8765, WebSocket :8766
+    python server.py --port 9000 --difficulty Hard --report 10
+
+Every connection gets its own SimState. Police start in manual mode and
+clients steer them. One coroutine advances all sessions together: each
+tick it applies the inputs queued since the last one, steps every
+simulation by the same dt, and writes each client only what changed.
+
+Clients speak newline-delimited JSON over plain TCP on --port, or the
+same messages as WebSocket text frames on --ws-port. Client to server:
+
+    {"action": "up"|"down"|"left"|"right"|"toggle_auto", "id": 17}
+    {"type": "reset"}                                  # new chase after the last one ended
+
+Server to client: "state" (the full map and positions, sent on connect,
+reset and grid reset), then "delta" messages holding only the fields that
+changed, the events, and "ack", the id of the last input applied. The
+session ends with an "end" message. Anything malformed, and inputs past
+MAX_INPUTS in one tick, get an "error" reply and are otherwise ignored.
+loadgen.py drives hundreds of these clients to measure tick latency and
+sessions per core.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from simulation import DIFFICULTIES, MOVES, POLICE_PLANNERS, TOGGLE_AUTO, SimState, step
+
+TICK_RATE = 30
+# A client whose unsent output passes this many bytes is too slow to keep up and is dropped
+MAX_BUFFER = 1 << 20
+# Inputs a session may queue between two ticks; more are refused so one client can't flood a tick
+MAX_INPUTS = 8
+# Longest line or frame a client may send, in bytes; a longer one gets an error reply and the connection is closed
+MAX_MESSAGE = 1 << 16
+ACTIONS = frozenset(MOVES) | {TOGGLE_AUTO}
+# police_move carries the whole path, which deltas already hold when it changes
+QUIET_EVENTS = frozenset({"police_move"})
+WS_GUID = b"258EAFA5-E914-47DA-95CA-C5AB0DC11B85"
+
+
+def _dumps(message):
+    return json.dumps(message, separators=(",", ":"))
+
+
+class LineChannel:
+    """Newline-delimited JSON over a plain TCP stream."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def receive(self):
+        line = await self.reader.readline()
+        return line.decode(errors="replace") if line else None
+
+    def send(self, text):
+        self.writer.write(text.encode() + b"\n")
+
+
+class WebSocketChannel:
+    """The same messages as WebSocket text frames: enough of RFC 6455 for unfragmented frames."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    async def handshake(self):
+        await self.reader.readline()
+        headers = {}
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if key is None:
+            self.writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+            return False
+        accept = base64.b64encode(hashlib.sha1(key.encode() + WS_GUID).digest()).decode()
+        self.writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                           f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        return True
+
+    async def receive(self):
+        while True:
+            head = await self.reader.readexactly(2)
+            opcode, length = head[0] & 0x0F, head[1] & 0x7F
+            if length == 126:
+                length = struct.unpack(">H", await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack(">Q", await self.reader.readexactly(8))[0]
+            if length > MAX_MESSAGE:
+                raise ValueError(f"frame of {length} bytes")
+            mask = await self.reader.readexactly(4) if head[1] & 0x80 else None
+            payload = await self.reader.readexactly(length)
+            if mask:
+                payload = (np.frombuffer(payload, np.uint8) ^ np.resize(np.frombuffer(mask, np.uint8), length)).tobytes()
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self._frame(0xA, payload)
+            elif opcode == 0x1:
+                return payload.decode(errors="replace")
+
+    def _frame(self, opcode, payload):
+        n = len(payload)
+        if n < 126:
+            head = struct.pack(">BB", 0x80 | opcode, n)
+        elif n < 1 << 16:
+            head = struct.pack(">BBH", 0x80 | opcode, 126, n)
+        else:
+            head = struct.pack(">BBQ", 0x80 | opcode, 127, n)
+        self.writer.write(head + payload)
+
+    def send(self, text):
+        self._frame(0x1, text.encode())
+
+
+class Session:
+    """One client's chase: its simulation, the inputs waiting for the next tick and what the client last saw."""
+
+    def __init__(self, sid, channel, difficulty, planner, seed):
+        self.sid = sid
+        self.channel = channel
+        self.state = SimState(difficulty, seed)
+        self.state.police_planner = planner
+        self.inputs = []
+        self.ack = None
+        self.sent = {}
+        self.ended = False
+        self.start()
+
+    def start(self, seed=None):
+        if seed is not None or self.sent:
+            self.state.reset(seed)
+        self.state.police_auto = False
+        self.ended = False
+        self.sent = self.fields()
+        self.channel.send(_dumps({"type": "state", "session": self.sid, "seed": self.state.seed,
+                                  "difficulty": self.state.difficulty, **self.board(), **self.sent}))
+
+    def board(self):
+        state = self.state
+        xs, ys = np.nonzero(state.items)
+        return {
+            "size": state.grid_size,
+            # Row-major, one digit per cell: 0 road, 1 building
+            "grid": (state.grid.astype(np.uint8) + ord("0")).tobytes().decode(),
+            "items": np.column_stack((xs, ys, state.items[xs, ys])).tolist(),
+        }
+
+    def fields(self):
+        state = self.state
+        return {
+            "police": state.police_pos,
+            "thief": state.thief_pos,
+            "auto": state.police_auto,
+            "path": state.police_path if state.police_auto else [],
+            "time_left": max(0, int(state.time_limit) - state.elapsed),
+            "power_up": int(state.power_up_timer) if state.power_up_active else 0,
+        }
+
+    def tick(self, dt):
+        """Apply queued inputs and advance dt; returns the message for the client, or None when nothing changed."""
+        state = self.state
+        events = []
+        for action, input_id in self.inputs:
+            events += step(state, action)
+            self.ack = input_id
+        acked = bool(self.inputs)
+        self.inputs.clear()
+        if self.ended:
+            return {"type": "delta", "ack": self.ack} if acked else None
+        events += step(state, None, dt)
+
+        message = {"type": "delta", "tick": state.ticks}
+        fields = self.fields()
+        for name, value in fields.items():
+            if self.sent.get(name) != value:
+                message[name] = value
+        self.sent = fields
+        if any(event["type"] == "grid_reset" for event in events):
+            message.update(self.board())
+        events = [event for event in events if event["type"] not in QUIET_EVENTS]
+        if events:
+            message["events"] = events
+        if acked:
+            message["ack"] = self.ack
+        if state.outcome:
+            self.ended = True
+            self.channel.send(_dumps(message))
+            return {"type": "end", "outcome": state.outcome, "score": state.score, "ticks": state.ticks}
+        return message if len(message) > 2 else None
+
+
+class GameServer:
+    """Every session on one batched tick loop, with per-window tick timing."""
+
+    def __init__(self, difficulty="Medium", planner="field", tick_rate=TICK_RATE, seed=None):
+        self.difficulty = difficulty
+        self.planner = planner
+        self.dt = 1.0 / tick_rate
+        self.seeds = np.random.default_rng(seed)
+        self.sessions = {}
+        self.next_id = 0
+        self.ticks = 0
+        self.late = 0
+        self.tick_times = deque(maxlen=10_000)
+        self.inputs = 0
+        self.dropped = 0
+
+    async def handle_tcp(self, reader, writer):
+        await self._play(LineChannel(reader, writer))
+
+    async def handle_websocket(self, reader, writer):
+        channel = WebSocketChannel(reader, writer)
+        try:
+            accepted = await channel.handshake()
+        except (ValueError, ConnectionError):
+            accepted = False
+        if accepted:
+            await self._play(channel)
+        else:
+            writer.close()
+
+    async def _play(self, channel):
+        sid = self.next_id
+        self.next_id += 1
+        session = self.sessions[sid] = Session(sid, channel, self.difficulty, self.planner, int(self.seeds.integers(1 << 63)))
+        try:
+            while True:
+                try:
+                    text = await channel.receive()
+                except ValueError:
+                    # Over MAX_MESSAGE (readline raises it too); the rest can't be skipped reliably, so the client goes
+                    channel.send(_dumps({"type": "error", "error": "message too long"}))
+                    break
+                if text is None:
+                    break
+                self._receive(session, text)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions.pop(sid, None)
+            channel.writer.close()
+
+    def _receive(self, session, text):
+        try:
+            message = json.loads(text)
+        except ValueError:
+            session.channel.send(_dumps({"type": "error", "error": "not JSON"}))
+            return
+        if not isinstance(message, dict):
+            session.channel.send(_dumps({"type": "error", "error": "not a JSON object"}))
+            return
+        action = message.get("action")
+        if isinstance(action, str) and action in ACTIONS:
+            if len(session.inputs) >= MAX_INPUTS:
+                session.channel.send(_dumps({"type": "error", "error": "too many inputs this tick", "id": message.get("id")}))
+                return
+            session.inputs.append((action, message.get("id")))
+            self.inputs += 1
+        elif message.get("type") == "reset":
+            session.start()
+        else:
+            session.channel.send(_dumps({"type": "error", "error": "unknown message"}))
+
+    def tick(self):
+        start = time.perf_counter()
+        for sid, session in list(self.sessions.items()):
+            message = session.tick(self.dt)
+            if message is not None:
+                session.channel.send(_dumps(message))
+            transport = session.channel.writer.transport
+            if transport.get_write_buffer_size() > MAX_BUFFER:
+                self.dropped += 1
+                del self.sessions[sid]
+                transport.abort()
+        self.ticks += 1
+        self.tick_times.append(time.perf_counter() - start)
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            self.tick()
+            deadline += self.dt
+            delay = deadline - loop.time()
+            if delay < 0:
+                # Behind schedule: skip the missed ticks rather than bursting through them
+                self.late += 1
+                deadline = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def report(self, window):
+        ms = np.array(self.tick_times) * 1000 if self.tick_times else np.zeros(1)
+        self.tick_times.clear()
+        p50, p99 = np.percentile(ms, (50, 99))
+        load = ms.mean() / (self.dt * 1000)
+        sessions = len(self.sessions)
+        per_core = f"{sessions / load:.0f}" if load and sessions else "-"
+        print(f"{sessions} sessions: tick mean {ms.mean():.2f} ms, p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {ms.max():.2f} ms, "
+              f"load {load:.0%} of one core (~{per_core} sessions/core), {self.late} late ticks, "
+              f"{self.inputs / window:.0f} inputs/s, {self.dropped} dropped", flush=True)
+        self.inputs = 0
+
+
+async def serve(args):
+    game = GameServer(args.difficulty, args.police_planner, args.tick_rate, args.seed)
+    servers = [await asyncio.start_server(game.handle_tcp, args.host, args.port, limit=MAX_MESSAGE, backlog=1024)]
+    if args.ws_port:
+        servers.append(await asyncio.start_server(game.handle_websocket, args.host, args.ws_port, limit=MAX_MESSAGE,
+                                                   backlog=1024))
+    print(f"serving TCP on {args.host}:{args.port}" + (f", WebSocket on {args.ws_port}" if args.ws_port else "")
+          + f" at {args.tick_rate} ticks/s", flush=True)
+    ticker = asyncio.create_task(game.run())
+    try:
+        while True:
+            await asyncio.sleep(args.report)
+            game.report(args.report)
+    finally:
+        ticker.cancel()
+        for server in servers:
+            server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765, help="newline-delimited JSON over TCP (default 8765)")
+    parser.add_argument("--ws-port", type=int, default=8766, help="the same over WebSocket (default 8766, 0 to disable)")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE)
+    parser.add_argument("--difficulty", choices=DIFFICULTIES, default="Medium")
+    parser.add_argument("--police-planner", choices=POLICE_PLANNERS, default="field")
+    parser.add_argument("--seed", type=int, help="seed the per-session seeds, for a reproducible run")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between timing reports (default 5)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,555 @@
+import itertools
+import random
+import threading
+import numpy as np
+from pathfinding import ClusterGraph, GridPathfinder, PursuitField, component_labels
+from pickups import PICKUP_KINDS, SCORE_BONUS, TIME_BONUS, place_pickups, spawn_cell
+from profiler import NULL_PROFILER
+from thief_ai import ExpertThief
+
+GRID_SIZE = 20
+LEVEL_TIME_LIMIT = 60
+MOVE_INTERVAL = 0.5
+BOOSTED_MOVE_INTERVAL = 0.25
+POWER_UP_DURATION = 10
+POWER_UP_COUNT = 3
+# Pickups placed on every grid (see pickups.py); the classic game has three speed boosts
+DEFAULT_PICKUPS = {"boost": POWER_UP_COUNT}
+STUCK_LIMIT = 10
+# Seconds of lookahead the Expert thief may spend per move
+EXPERT_BUDGET = 0.004
+
+difficulty_probs = {
+    "Easy": {"random": 0.7, "avoid": 0.2, "stay": 0.1},
+    "Medium": {"random": 0.4, "avoid": 0.5, "stay": 0.1},
+    "Hard": {"random": 0.1, "avoid": 0.8, "stay": 0.1}
+}
+# Expert plays the lookahead search instead of the weighted choice above
+DIFFICULTIES = ("Easy", "Medium", "Hard", "Expert")
+
+# Police route planners: repaired distance field, plain BFS, jump point search, cluster abstraction
+POLICE_PLANNERS = ("field", "bfs", "jps", "hpa")
+
+# Manual-mode actions accepted by step()
+MOVES = {"up": (-1, 0), "down": (1, 0), "left": (0, -1), "right": (0, 1)}
+TOGGLE_AUTO = "toggle_auto"
+
+_EPS = 1e-9
+
+# Grid versions are never reused, even across restored snapshots and clones
+_grid_versions = itertools.count(1)
+
+
+OBSTACLE_DENSITY = 0.3
+
+
+def _carve_path(grid, start, end, sampler):
+    # Cells of a random monotone staircase from start to end, inclusive
+    (sx, sy), (ex, ey) = start, end
+    steps = np.zeros(abs(ex - sx) + abs(ey - sy), dtype=bool)
+    steps[:abs(ex - sx)] = True
+    sampler.shuffle(steps)
+    xs = sx + np.sign(ex - sx) * np.concatenate(([0], np.cumsum(steps)))
+    ys = sy + np.sign(ey - sy) * np.concatenate(([0], np.cumsum(~steps)))
+    return xs, ys
+
+
+def generate_valid_grid(rng=random, size=GRID_SIZE, density=OBSTACLE_DENSITY):
+    """Random obstacle map whose open cells are all reachable from each other.
+
+    A random monotone corridor joins the two corners, then every open pocket
+    not connected to it is filled in, so there is nothing to reject and
+    retry. Filling pockets adds a little to the requested density.
+    """
+    sampler = np.random.default_rng(rng.getrandbits(64))
+    grid = (sampler.random((size, size), dtype=np.float32) <= density).astype(np.int8)
+    grid[_carve_path(grid, (0, 0), (size-1, size-1), sampler)] = 0
+    labels = component_labels(grid != 1)
+    grid[labels != labels[0, 0]] = 1
+    return grid, True
+
+
+def connect_cells(grid, cells, rng=random):
+    # Open a corridor from each blocked cell towards (0, 0) until it meets the open network
+    sampler = None
+    for cell in cells:
+        if grid[cell] != 1:
+            continue
+        sampler = sampler or np.random.default_rng(rng.getrandbits(64))
+        xs, ys = _carve_path(grid, cell, (0, 0), sampler)
+        reached = np.flatnonzero(grid[xs, ys] != 1)
+        stop = reached[0] if len(reached) else len(xs)
+        grid[xs[:stop], ys[:stop]] = 0
+
+
+class GridPool:
+    """Ready-made grids with their pickup layers, built ahead of time on a background thread.
+
+    Grid number k is always built from its own RNG seeded with (seed, k), so
+    the sequence handed out by take() is the same whether a grid came from
+    the prefetch thread or, when the pool ran dry or has no thread (web,
+    headless runs), was built on the spot.
+    """
+
+    def __init__(self, size, seed, density=OBSTACLE_DENSITY, pickups=DEFAULT_PICKUPS, prefetch=4, threaded=False):
+        self.size = size
+        self.seed = seed
+        self.density = density
+        self.pickups = pickups
+        self.prefetch = prefetch
+        self.next = 0
+        self.ready = {}
+        self.building = set()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.hits = 0
+        self.misses = 0
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self._run, name="grid-pool", daemon=True)
+            self.thread.start()
+
+    def _build(self, k):
+        rng = random.Random(f"{self.seed}:{k}")
+        grid, _ = generate_valid_grid(rng, self.size, self.density)
+        return grid, place_pickups(grid, rng, self.pickups)
+
+    def _wanted(self):
+        for k in range(self.next, self.next + self.prefetch):
+            if k not in self.ready and k not in self.building:
+                return k
+        return None
+
+    def _run(self):
+        while True:
+            with self.cond:
+                k = self._wanted()
+                while k is None and not self.closed:
+                    self.cond.wait()
+                    k = self._wanted()
+                if self.closed:
+                    return
+                self.building.add(k)
+            item = self._build(k)
+            with self.cond:
+                self.building.discard(k)
+                self.ready[k] = item
+                self.cond.notify_all()
+
+    def seek(self, k):
+        with self.cond:
+            self.next = k
+            self.cond.notify_all()
+
+    def take(self):
+        with self.cond:
+            k = self.next
+            self.next += 1
+            while k in self.building:
+                self.cond.wait()
+            item = self.ready.pop(k, None)
+            self.cond.notify_all()
+        if item is None:
+            self.misses += 1
+            return self._build(k)
+        self.hits += 1
+        return item
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+def manhattan_distance(pos1, pos2):
+    return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+
+
+def is_valid_move(grid, x, y):
+    return 0 <= x < len(grid) and 0 <= y < len(grid) and grid[x, y] != 1
+
+
+def get_neighbors(grid, pos):
+    x, y = pos
+    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    neighbors = []
+    for dx, dy in directions:
+        new_x, new_y = x + dx, y + dy
+        if is_valid_move(grid, new_x, new_y):
+            neighbors.append((new_x, new_y))
+    return neighbors
+
+
+def pursue(state):
+    return route_police(state.planner, state.pursuit, state.police_pos, state.thief_pos, state.police_planner, state.clusters)
+
+
+def route_police(planner, pursuit, start, thief_pos, mode="field", clusters=None):
+    # Route with the chosen planner, with the full search as fallback
+    target = thief_pos
+    if not planner.is_open(*target):
+        target = planner.nearest_open(target)
+    if target is not None and planner.is_open(*start):
+        if mode == "field":
+            path = pursuit.route(start, target)
+        elif mode == "jps":
+            path = planner.jps(start, target) or None
+        elif mode == "hpa":
+            path = clusters.path(start, target) or None
+        else:
+            path = None
+        if path is not None:
+            return path
+    return bfs_police_path(planner, start, thief_pos)
+
+
+def bfs_police_path(planner, start, target):
+    if not planner.is_open(*target):
+        target = planner.nearest_open(target)
+        if target is None:
+            return []
+
+    path = planner.bfs(start, target)
+    if path:
+        return path
+
+    # A* over the same cells can't succeed where BFS failed, so step greedily instead
+    neighbors = planner.neighbors(start)
+    if neighbors:
+        return [min(neighbors, key=lambda p: manhattan_distance(p, target))]
+    return []
+
+
+def decide_thief_move(state):
+    if state.difficulty == "Expert":
+        return state.expert.choose(state.thief_pos, state.police_pos)
+    probs = difficulty_probs[state.difficulty]
+    neighbors = get_neighbors(state.grid, state.thief_pos)
+
+    if neighbors:
+        choice = state.rng.random()
+        cumulative = 0
+        for action, prob in [("random", probs["random"]), ("avoid", probs["avoid"]), ("stay", probs["stay"])]:
+            cumulative += prob
+            if choice <= cumulative:
+                if action == "random":
+                    return state.rng.choice(neighbors)
+                elif action == "avoid":
+                    return max(neighbors, key=lambda p: manhattan_distance(p, state.police_pos))
+                return state.thief_pos
+    return state.thief_pos
+
+
+class SimState:
+    """Everything one chase needs, with time driven by step() instead of a wall clock.
+
+    snapshot() captures the chase itself (positions, timers, grid, pickups,
+    RNG streams) and restore() puts it back; both are O(1) apart from the
+    RNG states and the pursuit trail. Positions are tuples, the grid is
+    never written once set, and the pickup layer is only copied when an
+    item is taken or respawns after a snapshot took it, so snapshots share
+    everything until something changes. The planners and caches are
+    derived from the grid and reloaded only when a restore changes it. The
+    one that remembers past moves, the pursuit field, is saved as its
+    trail, so a restored or cloned chase plays out exactly like the
+    original.
+    """
+
+    __slots__ = (
+        "seeds", "grid_size", "grids", "difficulty", "planner", "pursuit", "clusters", "police_planner", "expert",
+        "profiler", "route_planner", "tape", "grid_version", "pickup_respawn", "items_shared",
+        "seed", "rng", "layout_rng", "grid_index", "ticks", "police_pos", "thief_pos", "police_auto", "police_path",
+        "clock", "move_timer", "move_interval", "power_up_active", "power_up_timer", "moves", "grid_resets",
+        "outcome", "score", "grid", "valid_grid", "items", "respawns", "time_bonus", "score_bonus",
+        "thief_stuck_counter", "police_stuck_counter",
+    )
+    # What snapshot() keeps; the RNG streams and the grid pool position are added separately
+    STATE = (
+        "difficulty", "police_planner", "seed", "grid_index", "ticks", "police_pos", "thief_pos", "police_auto",
+        "police_path", "clock", "move_timer", "move_interval", "power_up_active", "power_up_timer", "moves",
+        "grid_resets", "outcome", "score", "grid", "grid_version", "valid_grid", "items", "respawns", "time_bonus",
+        "score_bonus", "thief_stuck_counter", "police_stuck_counter",
+    )
+
+    def __init__(self, difficulty="Medium", seed=None, grid_size=GRID_SIZE, prefetch_grids=False, pickups=DEFAULT_PICKUPS):
+        # Master stream: the grid pool's seed, then one seed per episode (see reset)
+        self.seeds = random.Random(seed)
+        self._setup(difficulty, GridPool(grid_size, self.seeds.getrandbits(64), pickups=pickups, threaded=prefetch_grids))
+        self.reset()
+
+    def _setup(self, difficulty, grids):
+        # Everything that isn't the chase itself: planners, caches and hooks
+        self.grid_size = grids.size
+        self.grids = grids
+        self.difficulty = difficulty
+        self.planner = GridPathfinder(grids.size)
+        self.pursuit = PursuitField(self.planner)
+        self.clusters = ClusterGraph(self.planner)
+        self.police_planner = "field"
+        self.expert = ExpertThief(self.planner, EXPERT_BUDGET)
+        self.profiler = NULL_PROFILER
+        # Optional object with route(state) -> path used instead of pursue(), e.g. an AsyncRoutePlanner
+        self.route_planner = None
+        # Optional replay tape that records or supplies each move's outcome (see replay.py)
+        self.tape = None
+        # Seconds until a taken pickup reappears on a random free road cell; None keeps it gone
+        self.pickup_respawn = None
+        self.grid_version = 0
+        self.items_shared = False
+
+    def reset(self, seed=None):
+        # Each episode gets its own seed, so (seed, grid pool seed, grid index) reproduce it
+        self.seed = self.seeds.getrandbits(64) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.layout_rng = random.Random(f"{self.seed}:layout")
+        self.grid_index = self.grids.next
+        self.ticks = 0
+        self.police_pos = (0, 0)
+        self.thief_pos = (self.grid_size-1, self.grid_size-1)
+        self.police_auto = True
+        self.police_path = []
+        self.clock = 0.0
+        self.move_timer = 0.0
+        self.move_interval = MOVE_INTERVAL
+        self.power_up_active = False
+        self.power_up_timer = 0.0
+        self.moves = 0
+        self.grid_resets = 0
+        self.outcome = None
+        self.score = 0
+        self.time_bonus = 0.0
+        self.score_bonus = 0
+        self.new_grid()
+
+    def new_grid(self):
+        grid, items = self.grids.take()
+        # Every open cell of a pool grid is connected, so only cells under the characters need a way out
+        connect_cells(grid, (self.police_pos, self.thief_pos), self.layout_rng)
+        self.set_grid(grid, True, items)
+
+    def set_grid(self, grid, valid=True, items=None):
+        self.grid = grid
+        self.valid_grid = valid
+        self.items = np.zeros(grid.shape, dtype=np.int8) if items is None else items
+        self.items_shared = False
+        # Respawns still pending belong to the old map
+        self.respawns = ()
+        self.grid_version = next(_grid_versions)
+        self._load_grid()
+        self.thief_stuck_counter = 0
+        self.police_stuck_counter = 0
+
+    def _load_grid(self):
+        self.planner.load(self.grid)
+        self.pursuit.invalidate()
+        self.clusters.invalidate()
+        self.expert.clear()
+
+    def _own_items(self):
+        # Copy-on-write: a layer a snapshot still holds is copied before its first change
+        if self.items_shared:
+            self.items = self.items.copy()
+            self.items_shared = False
+
+    def take_item(self, pos):
+        """Remove and return the pickup code at pos (0 if the cell is empty)."""
+        code = int(self.items[pos])
+        if code:
+            self._own_items()
+            self.items[pos] = 0
+        return code
+
+    def put_item(self, pos, code):
+        self._own_items()
+        self.items[pos] = code
+
+    def snapshot(self):
+        """The chase at this point; taking one changes nothing about how the chase goes on."""
+        self.items_shared = True
+        return tuple(getattr(self, name) for name in self.STATE) + (
+            self.pursuit.save(), self.rng.getstate(), self.layout_rng.getstate(), self.grids.next)
+
+    def restore(self, snap):
+        version = self.grid_version
+        for name, value in zip(self.STATE, snap):
+            setattr(self, name, value)
+        self.rng.setstate(snap[-3])
+        self.layout_rng.setstate(snap[-2])
+        self.grids.seek(snap[-1])
+        self.items_shared = True
+        if self.grid_version != version:
+            self._load_grid()
+        self.pursuit.load(snap[-4])
+
+    def clone(self):
+        """Independent SimState at the same point, with its own planners and an unthreaded grid pool."""
+        other = SimState.__new__(SimState)
+        other.seeds = random.Random()
+        other.seeds.setstate(self.seeds.getstate())
+        other._setup(self.difficulty, GridPool(self.grid_size, self.grids.seed, pickups=self.grids.pickups))
+        other.police_planner = self.police_planner
+        other.pickup_respawn = self.pickup_respawn
+        other.expert.budget, other.expert.node_budget = self.expert.budget, self.expert.node_budget
+        other.rng = random.Random()
+        other.layout_rng = random.Random()
+        other.restore(self.snapshot())
+        return other
+
+    @property
+    def elapsed(self):
+        return int(self.clock + _EPS)
+
+    @property
+    def time_limit(self):
+        return LEVEL_TIME_LIMIT + self.time_bonus
+
+
+def _regenerate(state, reason, events):
+    state.new_grid()
+    state.grid_resets += 1
+    events.append({"type": "grid_reset", "reason": reason})
+
+
+def _apply_action(state, action, events):
+    if action == TOGGLE_AUTO:
+        state.police_auto = not state.police_auto
+        events.append({"type": "mode", "auto": state.police_auto})
+    elif action in MOVES and not state.police_auto:
+        dx, dy = MOVES[action]
+        new_pos = (state.police_pos[0] + dx, state.police_pos[1] + dy)
+        if is_valid_move(state.grid, new_pos[0], new_pos[1]):
+            state.police_pos = new_pos
+            state.police_stuck_counter = 0
+        else:
+            events.append({"type": "invalid_move", "pos": state.police_pos})
+
+
+def plan_police(state):
+    if state.route_planner is None:
+        return pursue(state)
+    return state.route_planner.route(state)
+
+
+def _move_tick(state, events):
+    state.moves += 1
+    with state.profiler.stage("thief_ai"):
+        new_pos = decide_thief_move(state) if state.tape is None else state.tape.thief(state)
+    if new_pos != state.thief_pos:
+        state.thief_pos = new_pos
+        state.thief_stuck_counter = 0
+    elif state.difficulty != "Expert":
+        # The Expert stays on purpose (out of reach in a far corner, say), so only the other thieves get stuck
+        state.thief_stuck_counter += 1
+
+    if state.thief_stuck_counter >= STUCK_LIMIT:
+        _regenerate(state, "thief", events)
+
+    if state.police_auto:
+        with state.profiler.stage("police_ai"):
+            state.police_path = plan_police(state) if state.tape is None else state.tape.police(state)
+        if len(state.police_path) > 1:
+            state.police_pos = state.police_path[1]
+            state.police_stuck_counter = 0
+        elif len(state.police_path) == 1:
+            state.police_stuck_counter = 0
+        else:
+            state.police_stuck_counter += 1
+        events.append({"type": "police_move", "pos": state.police_pos, "path": state.police_path})
+    else:
+        state.police_path = []
+
+    if state.police_stuck_counter >= STUCK_LIMIT:
+        _regenerate(state, "police", events)
+
+    code = state.take_item(state.police_pos)
+    if code:
+        _collect(state, code, events)
+
+    if state.police_pos == state.thief_pos:
+        state.outcome = "caught"
+        state.score = max(10000 - state.elapsed * 100, 0) + state.score_bonus
+        events.append({"type": "capture", "pos": state.police_pos, "score": state.score})
+
+
+def _collect(state, code, events):
+    kind = PICKUP_KINDS[code - 1]
+    if kind == "boost":
+        state.power_up_active = True
+        state.power_up_timer = POWER_UP_DURATION
+        state.move_interval = BOOSTED_MOVE_INTERVAL
+    elif kind == "time":
+        state.time_bonus += TIME_BONUS
+    elif kind == "bonus":
+        state.score_bonus += SCORE_BONUS
+    if state.pickup_respawn is not None:
+        state.respawns += ((state.clock + state.pickup_respawn, code),)
+    events.append({"type": "pickup", "kind": kind, "pos": state.police_pos})
+
+
+def _respawn(state, events):
+    due = 0
+    while due < len(state.respawns) and state.respawns[due][0] <= state.clock + _EPS:
+        code = state.respawns[due][1]
+        cell = spawn_cell(state.grid, state.items, state.layout_rng, (state.police_pos, state.thief_pos))
+        if cell is not None:
+            state.put_item(cell, code)
+            events.append({"type": "pickup_spawn", "kind": PICKUP_KINDS[code - 1], "pos": cell})
+        due += 1
+    state.respawns = state.respawns[due:]
+
+
+def step(state, action=None, dt=0.0):
+    """Apply one manual action and/or advance the simulated clock by dt seconds.
+
+    Returns the list of events produced, in order. A finished chase ignores
+    further steps.
+    """
+    events = []
+    if state.outcome:
+        return events
+    if action is not None:
+        if state.tape is not None:
+            state.tape.action(state, action)
+        _apply_action(state, action, events)
+    if dt <= 0:
+        return events
+
+    state.ticks += 1
+    state.clock += dt
+    if state.clock + _EPS >= state.time_limit:
+        state.outcome = "timeout"
+        events.append({"type": "timeout"})
+        return events
+
+    if state.power_up_active:
+        state.power_up_timer -= dt
+        if state.power_up_timer <= _EPS:
+            state.power_up_active = False
+            state.move_interval = MOVE_INTERVAL
+            events.append({"type": "power_up_end"})
+
+    if state.respawns and state.respawns[0][0] <= state.clock + _EPS:
+        _respawn(state, events)
+
+    state.move_timer += dt
+    while state.move_timer + _EPS >= state.move_interval and not state.outcome:
+        state.move_timer -= state.move_interval
+        _move_tick(state, events)
+    return events
+
+
+def next_event_dt(state):
+    # Largest dt that lands exactly on the next move tick, power-up expiry, pickup respawn or time limit
+    dt = max(state.move_interval - state.move_timer, 0.0)
+    if state.power_up_active:
+        dt = min(dt, state.power_up_timer)
+    if state.respawns:
+        dt = min(dt, state.respawns[0][0] - state.clock)
+    return max(min(dt, state.time_limit - state.clock), _EPS)
+
+
+def run_episode(seed=None, difficulty="Medium", grid_size=GRID_SIZE):
+    state = SimState(difficulty, seed, grid_size)
+    while not state.outcome:
+        step(state, None, next_event_dt(state))
+    return state
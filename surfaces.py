@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+import pygame
+
+
+class SurfaceCache:
+    """Rendered text, glow and overlay surfaces, reused until evicted.
+
+    Each surface is keyed by everything that goes into drawing it (font,
+    text, size, color, alpha), so a repeated request is a dict lookup
+    instead of a font.render or Surface allocation. The least recently
+    used entries are dropped past ``capacity``. Returned surfaces are
+    shared: blit them, never draw on them.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key, build):
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.surfaces[key] = build()
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def text(self, font, text, color):
+        return self._get(("text", font, text, color), lambda: font.render(text, True, color))
+
+    def glow(self, size, color, alpha, pad, radius=0):
+        """A translucent rounded rect of ``size`` with ``pad`` pixels of clear margin on every side."""
+        def build():
+            width, height = size
+            surface = pygame.Surface((width + 2 * pad, height + 2 * pad), pygame.SRCALPHA)
+            pygame.draw.rect(surface, (*color, alpha), (pad, pad, width, height), border_radius=radius)
+            return surface
+        return self._get(("glow", size, color, alpha, pad, radius), build)
+
+    def overlay(self, size, color, alpha):
+        def build():
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill((*color, alpha))
+            return surface
+        return self._get(("overlay", size, color, alpha), build)
+
+    def clear(self):
+        self.surfaces.clear()
@@ -0,0 +1,111 @@
+import json
+import sys
+import threading
+import time
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR, "off": 100}
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+
+class Telemetry:
+    """Leveled, structured event log that never writes on the caller's thread.
+
+    emit() only stores (time, level, kind, fields) in a preallocated ring
+    buffer; formatting and I/O happen in flush(), which a background thread
+    runs every ``flush_interval`` seconds. Without threads (Emscripten) the
+    game calls pump() once per frame and it flushes at the same interval.
+    When the ring is full the oldest events are overwritten and counted.
+    """
+
+    def __init__(self, level=INFO, capacity=4096, stream=None, fmt="text", flush_interval=0.5, threaded=True):
+        self.level = level
+        self.capacity = capacity
+        self.ring = [None] * capacity
+        self.head = 0
+        self.size = 0
+        self.dropped = 0
+        self.stream = stream
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.last_flush = time.perf_counter()
+        self.lock = threading.Lock()
+        self.closed = threading.Event()
+        self.thread = None
+        if threaded:
+            self.thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+            self.thread.start()
+
+    def enabled(self, level):
+        return level >= self.level
+
+    def emit(self, level, kind, **fields):
+        if level < self.level:
+            return
+        with self.lock:
+            self.ring[(self.head + self.size) % self.capacity] = (time.time(), level, kind, fields)
+            if self.size < self.capacity:
+                self.size += 1
+            else:
+                self.head = (self.head + 1) % self.capacity
+                self.dropped += 1
+
+    def debug(self, kind, **fields):
+        self.emit(DEBUG, kind, **fields)
+
+    def info(self, kind, **fields):
+        self.emit(INFO, kind, **fields)
+
+    def warning(self, kind, **fields):
+        self.emit(WARNING, kind, **fields)
+
+    def error(self, kind, **fields):
+        self.emit(ERROR, kind, **fields)
+
+    def _drain(self):
+        with self.lock:
+            head, size, dropped = self.head, self.size, self.dropped
+            events = [self.ring[(head + i) % self.capacity] for i in range(size)]
+            for i in range(size):
+                self.ring[(head + i) % self.capacity] = None
+            self.head = (head + size) % self.capacity
+            self.size = 0
+            self.dropped = 0
+        return events, dropped
+
+    def _format(self, event):
+        stamp, level, kind, fields = event
+        if self.fmt == "json":
+            return json.dumps({"t": round(stamp, 6), "level": LEVEL_NAMES.get(level, level), "event": kind, **fields}, default=str)
+        details = " ".join(f"{key}={value}" for key, value in fields.items())
+        return f"[{LEVEL_NAMES.get(level, level)}] {kind} {details}".rstrip()
+
+    def flush(self):
+        events, dropped = self._drain()
+        self.last_flush = time.perf_counter()
+        if not events and not dropped:
+            return
+        lines = [self._format(event) for event in events]
+        if dropped:
+            lines.append(self._format((time.time(), WARNING, "telemetry_dropped", {"count": dropped})))
+        stream = self.stream or sys.stdout
+        stream.write("\n".join(lines) + "\n")
+        stream.flush()
+
+    def pump(self):
+        if self.thread is None and time.perf_counter() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def _run(self):
+        while not self.closed.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        self.closed.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.flush()
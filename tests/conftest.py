@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests that draw run on SDL's dummy drivers, with no window or sound device
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("CATCH_THIEF_CACHE", "")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
@@ -0,0 +1,77 @@
+import random
+from collections import deque
+
+import numpy as np
+import pytest
+
+from pathfinding import component_labels
+from simulation import GridPool, generate_valid_grid
+
+
+def reachable(grid, start):
+    # Plain BFS, independent of the vectorized code under test
+    size = len(grid)
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < size and 0 <= ny < size and grid[nx][ny] == 0 and (nx, ny) not in seen:
+                seen.add((nx, ny))
+                queue.append((nx, ny))
+    return seen
+
+
+@pytest.mark.parametrize("size", [2, 20, 57])
+@pytest.mark.parametrize("density", [0.1, 0.3, 0.6])
+def test_every_open_cell_is_reachable(size, density):
+    for seed in range(10):
+        grid, valid = generate_valid_grid(random.Random(seed), size, density)
+        assert valid
+        assert grid.shape == (size, size) and grid.dtype == np.int8
+        assert grid[0, 0] == 0 and grid[-1, -1] == 0
+        open_cells = {tuple(map(int, cell)) for cell in zip(*np.nonzero(grid == 0))}
+        assert reachable(grid.tolist(), (0, 0)) == open_cells
+
+
+def test_component_labels_match_bfs():
+    rng = np.random.default_rng(3)
+    for _ in range(20):
+        open_cells = rng.random((15, 15)) > 0.45
+        labels = component_labels(open_cells)
+        grid = (~open_cells).astype(int).tolist()
+        assert (labels[~open_cells] == -1).all()
+        for cell in zip(*np.nonzero(open_cells)):
+            cell = tuple(map(int, cell))
+            component = reachable(grid, cell)
+            assert {labels[c] for c in component} == {labels[cell]}
+            assert (labels == labels[cell]).sum() == len(component)
+
+
+def take(pool, count):
+    try:
+        return [pool.take() for _ in range(count)]
+    finally:
+        pool.close()
+
+
+def same(a, b):
+    return all(np.array_equal(ga, gb) and np.array_equal(ia, ib) for (ga, ia), (gb, ib) in zip(a, b))
+
+
+def test_grid_pool_is_deterministic_per_seed():
+    pickups = {"boost": 3, "time": 0.02, "bonus": 0.02}
+    built = take(GridPool(25, 11, pickups=pickups), 6)
+    # The prefetch thread hands out the very same grids and pickup layers
+    assert same(built, take(GridPool(25, 11, pickups=pickups, threaded=True), 6))
+    assert same(built, take(GridPool(25, 11, pickups=pickups), 6))
+    assert not same(built, take(GridPool(25, 12, pickups=pickups), 6))
+    for grid, items in built:
+        assert (grid == 0).any() and (items[grid == 1] == 0).all()
+
+
+def test_grid_pool_seek_picks_the_grid_by_index():
+    built = take(GridPool(20, 5), 4)
+    pool = GridPool(20, 5, threaded=True)
+    pool.seek(2)
+    assert same(built[2:], take(pool, 2))
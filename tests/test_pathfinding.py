@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from pathfinding import ClusterGraph, GridPathfinder, PursuitField
+
+TRIALS = 300
+DENSITIES = (0.0, 0.1, 0.3, 0.45)
+
+
+def random_grid(rng, max_size):
+    size = int(rng.integers(1, max_size))
+    return (rng.random((size, size)) < rng.choice(DENSITIES)).astype(np.int8)
+
+
+def open_cells(grid):
+    return [tuple(map(int, cell)) for cell in zip(*np.nonzero(grid == 0))]
+
+
+def assert_walk(grid, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (ax, ay), (bx, by) in zip(path, path[1:]):
+        assert abs(ax - bx) + abs(ay - by) == 1
+        assert grid[bx, by] == 0
+
+
+def flip_cell(rng, grid, planner):
+    size = len(grid)
+    x, y = map(int, rng.integers(0, size, 2))
+    grid[x, y] = 1 - grid[x, y]
+    planner.set_cell(x, y, int(grid[x, y]))
+
+
+@pytest.mark.parametrize("search", ["jps", "hpa"])
+def test_searches_match_bfs_lengths(search):
+    for trial in range(TRIALS):
+        rng = np.random.default_rng(trial)
+        grid = random_grid(rng, 40)
+        pf = GridPathfinder(len(grid))
+        pf.load(grid)
+        clusters = ClusterGraph(pf, int(rng.integers(2, 12)))
+        find = clusters.path if search == "hpa" else getattr(pf, search)
+        # Editors go through the cluster graph so it can drop the clusters an edit touches
+        editor = clusters if search == "hpa" else pf
+        for query in range(6):
+            if query in (2, 4):
+                flip_cell(rng, grid, editor)
+            cells = open_cells(grid)
+            if not cells:
+                break
+            start, goal = (cells[i] for i in rng.integers(len(cells), size=2))
+            expected = pf.bfs(start, goal)
+            path = find(start, goal)
+            assert len(path) == len(expected), (trial, search, start, goal)
+            if path:
+                assert_walk(grid, path, start, goal)
+
+
+@pytest.mark.parametrize("slack", [0.0, 0.25])
+def test_pursuit_field_tracks_a_moving_target(slack):
+    for trial in range(TRIALS // 3):
+        rng = np.random.default_rng(trial)
+        grid = random_grid(rng, 30)
+        pf = GridPathfinder(len(grid))
+        pf.load(grid)
+        field = PursuitField(pf, slack)
+        cells = open_cells(grid)
+        if not cells:
+            continue
+        pursuer, target = (cells[i] for i in rng.integers(len(cells), size=2))
+        for move in range(30):
+            if move == 15:
+                flip_cell(rng, grid, field)
+                if grid[pursuer] or grid[target]:
+                    break
+            expected = pf.bfs(pursuer, target)
+            route = field.route(pursuer, target)
+            if not expected:
+                assert route is None
+                break
+            assert_walk(grid, route, pursuer, target)
+            assert len(route) - 1 <= (1 + slack) * (len(expected) - 1)
+            if len(route) > 1:
+                pursuer = route[1]
+            steps = pf.neighbors(target)
+            if steps:
+                target = steps[int(rng.integers(len(steps)))]
+
+
+def test_pursuit_field_load_gives_the_same_routes():
+    rng = np.random.default_rng(5)
+    grid = (rng.random((40, 40)) < 0.25).astype(np.int8)
+    grid[0, 0] = grid[39, 39] = 0
+    pf = GridPathfinder(40)
+    pf.load(grid)
+    field = PursuitField(pf)
+    pursuer, target = (0, 0), (39, 39)
+    routes = []
+    saved = None
+    for move in range(40):
+        if move == 10:
+            saved, at = field.save(), (pursuer, target)
+        route = field.route(pursuer, target)
+        if route is None:
+            break
+        routes.append(route)
+        pursuer = route[1] if len(route) > 1 else pursuer
+        steps = pf.neighbors(target)
+        target = steps[move % len(steps)] if steps else target
+    assert saved is not None and len(routes) > 20
+    field.invalidate()
+    field.route((0, 0), (39, 39))
+    field.load(saved)
+    pursuer, target = at
+    for move in range(10, len(routes)):
+        route = field.route(pursuer, target)
+        assert route == routes[move]
+        pursuer = route[1] if len(route) > 1 else pursuer
+        steps = pf.neighbors(target)
+        target = steps[move % len(steps)] if steps else target
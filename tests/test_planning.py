@@ -0,0 +1,41 @@
+from planning import AsyncRoutePlanner
+from simulation import SimState, get_neighbors
+
+
+def settle(planner, state):
+    # Let the queued search finish and pick up its path
+    for _, _, future in planner.inflight:
+        future.result()
+    return planner.route(state)
+
+
+def test_thief_next_to_the_police_is_not_chased_along_a_stale_path():
+    for seed in range(20):
+        state = SimState("Medium", seed)
+        planner = AsyncRoutePlanner()
+        try:
+            planner.route(state)
+            path = settle(planner, state)
+            sides = [cell for cell in get_neighbors(state.grid, state.police_pos) if cell not in path]
+            if len(path) < 3 or not sides:
+                continue
+            state.thief_pos = sides[0]
+            assert planner.route(state) == [state.police_pos, sides[0]]
+            state.thief_pos = state.police_pos
+            assert planner.route(state) == [state.police_pos]
+            return
+        finally:
+            planner.close()
+    raise AssertionError("no seed put the police beside a cell off its route")
+
+
+def test_routes_match_the_inline_planner():
+    state = SimState("Medium", 5)
+    planner = AsyncRoutePlanner()
+    try:
+        planner.route(state)
+        path = settle(planner, state)
+    finally:
+        planner.close()
+    assert path[0] == state.police_pos and path[-1] == state.thief_pos
+    assert len(path) == len(state.pursuit.route(state.police_pos, state.thief_pos))
@@ -0,0 +1,137 @@
+import asyncio
+
+import numpy as np
+import pygame
+import pytest
+
+from presentation import DirtyRegions
+
+SIZE = (200, 150)
+
+
+@pytest.fixture
+def window(monkeypatch):
+    """The dummy window plus a copy of what it shows: flip() shows everything, update(rects) only those rects."""
+    pygame.display.init()
+    screen = pygame.display.set_mode(SIZE)
+    shown = screen.copy()
+    flip, update = pygame.display.flip, pygame.display.update
+
+    def fake_flip():
+        shown.blit(screen, (0, 0))
+        flip()
+
+    def fake_update(rects):
+        for rect in rects:
+            shown.blit(screen, rect, rect)
+        update(rects)
+
+    monkeypatch.setattr(pygame.display, "flip", fake_flip)
+    monkeypatch.setattr(pygame.display, "update", fake_update)
+    yield screen, shown
+    pygame.display.quit()
+
+
+def pixels(surface):
+    return pygame.surfarray.array3d(surface)
+
+
+def test_partial_frames_show_the_same_pixels_as_full_ones(window):
+    screen, shown = window
+    background = pygame.Surface(SIZE)
+    rng = np.random.default_rng(3)
+    for x in range(0, SIZE[0], 10):
+        for y in range(0, SIZE[1], 10):
+            background.fill(tuple(int(c) for c in rng.integers(0, 255, 3)), (x, y, 10, 10))
+    sprite = pygame.Surface((24, 24))
+    sprite.fill((255, 0, 128))
+    presenter = DirtyRegions(SIZE)
+    full = pygame.Surface(SIZE)
+
+    positions = rng.integers(-30, 220, (4, 2))
+    for frame in range(120):
+        positions += rng.integers(-9, 10, positions.shape)
+        if presenter.begin(frame % 40 != 0):
+            presenter.restore(screen, background, (0, 0, 0))
+        else:
+            screen.fill((0, 0, 0))
+            screen.blit(background, (0, 0))
+        for x, y in positions.tolist():
+            presenter.add(screen.blit(sprite, (x, y)))
+        presenter.present()
+
+        full.fill((0, 0, 0))
+        full.blit(background, (0, 0))
+        for x, y in positions.tolist():
+            full.blit(sprite, (x, y))
+        assert (pixels(shown) == pixels(full)).all(), frame
+    assert presenter.partial_frames > presenter.full_frames > 0
+
+
+def test_game_partial_frames_match_full_redraws(monkeypatch):
+    import game
+
+    game.setup()
+    ticks = [0]
+    monkeypatch.setattr(pygame.time, "get_ticks", lambda: ticks[0])
+    shown = game.screen.copy()
+    checks = {"frames": 0, "partial": 0, "bad": []}
+    draw_entities = game.draw_entities
+
+    def checked_draw_entities(path=(), alpha=1.0):
+        # On a partial frame, draw the same state again from scratch and compare
+        shake = game.screen_shake
+        draw_entities(path, alpha)
+        presenter = game.presenter
+        if not presenter.partial:
+            return
+        partial = game.screen.copy()
+        saved = (presenter.active, presenter.partial, list(presenter.rects), game.invalid_move_timer,
+                 game.screen_shake, game.particles.count)
+        presenter.active = presenter.partial = False
+        game.invalid_move_timer, game.screen_shake = 0, shake
+        game.screen.fill(game.DEEP_PURPLE)
+        game.draw_grid()
+        draw_entities(path, alpha)
+        if not (pixels(partial) == pixels(game.screen)).all():
+            checks["bad"].append(("redraw", checks["frames"]))
+        (presenter.active, presenter.partial, presenter.rects, game.invalid_move_timer,
+         game.screen_shake, game.particles.count) = saved
+        game.screen.blit(partial, (0, 0))
+        checks["partial"] += 1
+
+    def on_frame():
+        checks["frames"] += 1
+        ticks[0] += 16
+        if not (pixels(shown) == pixels(game.screen)).all():
+            checks["bad"].append(("shown", checks["frames"]))
+        frame = checks["frames"]
+        if game.game_state == "welcome" and frame % 20 == 5:
+            pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=1, pos=game.button_rect.center))
+        keys = {40: pygame.K_m, 45: pygame.K_s, 46: pygame.K_a, 50: pygame.K_m, 90: pygame.K_p, 100: pygame.K_p}
+        if frame in keys:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=keys[frame]))
+        if frame >= 240:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    flip, update = pygame.display.flip, pygame.display.update
+
+    def fake_flip():
+        shown.blit(game.screen, (0, 0))
+        flip()
+        on_frame()
+
+    def fake_update(rects):
+        for rect in rects:
+            shown.blit(game.screen, rect, rect)
+        update(rects)
+        on_frame()
+
+    monkeypatch.setattr(game, "draw_entities", checked_draw_entities)
+    monkeypatch.setattr(pygame.display, "flip", fake_flip)
+    monkeypatch.setattr(pygame.display, "update", fake_update)
+    asyncio.run(game.update_loop())
+
+    assert checks["bad"] == []
+    assert checks["partial"] > 100
+    assert game.presenter.partial_frames > 100
@@ -0,0 +1,33 @@
+from quality import TIER_NAMES, QualityGovernor
+
+
+class Recorder:
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, kind, **fields):
+        self.warnings.append((kind, fields))
+
+
+def test_unknown_pinned_tier_is_reported_and_ignored():
+    telemetry = Recorder()
+    governor = QualityGovernor(1 / 60, pinned="Hihg", telemetry=telemetry)
+    assert not governor.pinned
+    assert governor.tier["name"] == TIER_NAMES[0]
+    assert telemetry.warnings[0][0] == "unknown_quality_tier"
+
+
+def test_pinned_tier_holds():
+    governor = QualityGovernor(1 / 60, window=10, pinned="Low")
+    for _ in range(100):
+        assert governor.update(1.0) is None
+    assert governor.tier["name"] == "Low"
+
+
+def test_slow_frames_step_down_and_fast_ones_back_up():
+    governor = QualityGovernor(1 / 60, window=10)
+    changes = [governor.update(1 / 30) for _ in range(10)]
+    assert changes[-1]["name"] == TIER_NAMES[1]
+    while governor.index:
+        governor.update(1 / 600)
+    assert governor.tier["name"] == TIER_NAMES[0]
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from replay import Recorder, Replay, play
+from simulation import SimState, step
+
+TICK_RATE = 30
+
+
+def record(path, seed=7):
+    state = SimState("Medium", seed)
+    state.tape = Recorder(state, TICK_RATE)
+    while not state.outcome:
+        step(state, None, 1.0 / TICK_RATE)
+    replay = state.tape.finish(state)
+    replay.save(path)
+    return replay
+
+
+def test_headless_playback_matches_recording(tmp_path):
+    path = tmp_path / "chase.ctr"
+    recorded = record(str(path))
+    state = play(Replay.load(str(path)))
+    assert (state.ticks, state.outcome, state.score) == (recorded.ticks, recorded.outcome, recorded.score)
+
+
+def test_render_plays_to_the_end(tmp_path):
+    path = tmp_path / "chase.ctr"
+    recorded = record(str(path))
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    result = subprocess.run([sys.executable, "replay.py", str(path), "--render", "--speed", "30"],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert f"{recorded.outcome} score {recorded.score}" in result.stdout.splitlines()[-1]
+
+
+def test_recorder_rejects_an_unknown_planner():
+    state = SimState("Medium", 7)
+    state.police_planner = "dijkstra"
+    with pytest.raises(ValueError):
+        Recorder(state, TICK_RATE)
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import struct
+
+from loadgen import WebSocketClient
+from server import MAX_INPUTS, MAX_MESSAGE, GameServer
+
+
+async def _connect(game, handler=None):
+    server = await asyncio.start_server(handler or game.handle_tcp, "127.0.0.1", 0, limit=MAX_MESSAGE)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    return server, reader, writer
+
+
+async def _read(reader):
+    return json.loads(await asyncio.wait_for(reader.readline(), 5))
+
+
+def test_malformed_messages_get_error_replies():
+    async def run():
+        game = GameServer(seed=1)
+        server, reader, writer = await _connect(game)
+        assert (await _read(reader))["type"] == "state"
+        for line in (b"5", b"[]", b'"up"', b"null", b"not json", b'{"action": []}', b'{"action": {}}',
+                     b'{"type": "nope"}', b"\xff\xfe"):
+            writer.write(line + b"\n")
+            reply = await _read(reader)
+            assert reply["type"] == "error", line
+        # The connection survives all of that and still plays
+        writer.write(b'{"action": "toggle_auto", "id": 1}\n')
+        await asyncio.sleep(0.05)
+        game.tick()
+        reply = await _read(reader)
+        assert reply["ack"] == 1
+        assert len(game.sessions) == 1
+        writer.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_inputs_are_capped_per_tick():
+    async def run():
+        game = GameServer(seed=1)
+        server, reader, writer = await _connect(game)
+        await _read(reader)
+        writer.write(b"".join(b'{"action": "left", "id": %d}\n' % i for i in range(MAX_INPUTS + 5)))
+        refused = [(await _read(reader))["id"] for _ in range(5)]
+        assert refused == list(range(MAX_INPUTS, MAX_INPUTS + 5))
+        game.tick()
+        assert (await _read(reader))["ack"] == MAX_INPUTS - 1
+        writer.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_overlong_line_gets_an_error_and_closes():
+    async def run():
+        game = GameServer(seed=1)
+        server, reader, writer = await _connect(game)
+        await _read(reader)
+        writer.write(b'{"action": "' + b"x" * MAX_MESSAGE + b'"}\n')
+        assert (await _read(reader))["error"] == "message too long"
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        assert not game.sessions
+        writer.close()
+        server.close()
+
+    asyncio.run(run())
+
+
+def test_oversized_websocket_frame_is_refused_before_its_payload():
+    async def run():
+        game = GameServer(seed=1)
+        server, reader, writer = await _connect(game, game.handle_websocket)
+        client = WebSocketClient(reader, writer)
+        await client.handshake("127.0.0.1", server.sockets[0].getsockname()[1])
+        assert json.loads(await asyncio.wait_for(client.receive(), 5))["type"] == "state"
+        # Only the header: the server has to answer without waiting for a 1 GiB payload
+        writer.write(struct.pack(">BBQ", 0x81, 0x80 | 127, 1 << 30) + os.urandom(4))
+        assert json.loads(await asyncio.wait_for(client.receive(), 5))["error"] == "message too long"
+        assert await asyncio.wait_for(reader.read(), 5) == b""
+        writer.close()
+        server.close()
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+import pytest
+
+from pickups import pickup_code
+from simulation import DIFFICULTIES, POLICE_PLANNERS, SimState, next_event_dt, step
+
+SEEDS = range(4)
+# Expert chases tend to run to the time limit; this many moves is plenty to tell runs apart
+MAX_STEPS = 250
+
+
+def new_state(seed, difficulty, planner, size=30):
+    state = SimState(difficulty, seed, grid_size=size, pickups={"boost": 3, "time": 0.02, "bonus": 0.02})
+    state.police_planner = planner
+    state.pickup_respawn = 2.0
+    # A node count instead of the clock, so Expert moves are reproducible
+    state.expert.node_budget = 150
+    return state
+
+
+def result(state):
+    return state.outcome, state.ticks, state.score, state.grid_resets, state.police_pos, state.thief_pos, state.moves
+
+
+def play(state, snapshot_every_tick=False):
+    trace = []
+    while not state.outcome and len(trace) < MAX_STEPS:
+        if snapshot_every_tick:
+            state.snapshot()
+        step(state, None, next_event_dt(state))
+        trace.append((state.police_pos, state.thief_pos))
+    return result(state), trace
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+@pytest.mark.parametrize("planner", POLICE_PLANNERS)
+def test_snapshots_do_not_change_the_game(difficulty, planner):
+    for seed in SEEDS:
+        plain = play(new_state(seed, difficulty, planner))
+        assert play(new_state(seed, difficulty, planner), snapshot_every_tick=True) == plain
+
+
+@pytest.mark.parametrize("difficulty", DIFFICULTIES)
+@pytest.mark.parametrize("planner", POLICE_PLANNERS)
+def test_restore_and_clone_replay_identically(difficulty, planner):
+    for seed in SEEDS:
+        state = new_state(seed, difficulty, planner)
+        for _ in range(seed * 7 + 5):
+            if state.outcome:
+                break
+            step(state, None, next_event_dt(state))
+        snap = state.snapshot()
+        other = state.clone()
+        original = play(state)
+        state.restore(snap)
+        assert play(state) == original
+        assert play(other) == original
+
+
+def test_restore_across_grid_resets():
+    state = new_state(3, "Hard", "field")
+    snap = state.snapshot()
+    original = play(state)
+    assert state.grid_version != snap[SimState.STATE.index("grid_version")] or state.grid_resets == 0
+    state.restore(snap)
+    assert play(state) == original
+
+
+def test_pickup_layer_is_copied_on_write():
+    state = SimState("Medium", 1, grid_size=20, pickups={"bonus": 5})
+    cells = list(zip(*state.items.nonzero()))
+    snap = state.snapshot()
+    held = snap[SimState.STATE.index("items")]
+    assert state.items is held
+
+    assert state.take_item(cells[0]) == pickup_code("bonus")
+    assert state.items is not held
+    assert held[cells[0]] == pickup_code("bonus")
+    assert state.items[cells[0]] == 0
+
+    # Once owned, further changes don't copy again
+    owned = state.items
+    state.take_item(cells[1])
+    assert state.items is owned
+
+    state.restore(snap)
+    assert state.items is held
+    assert state.items[cells[0]] == pickup_code("bonus")
+    state.put_item(cells[0], 0)
+    assert held[cells[0]] == pickup_code("bonus")
+
+
+def test_clone_is_independent():
+    state = new_state(2, "Medium", "field")
+    other = state.clone()
+    play(other)
+    assert state.ticks == 0 and not state.outcome
+    assert other.grids is not state.grids and other.planner is not state.planner
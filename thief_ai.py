@@ -0,0 +1,173 @@
+import time
+from collections import OrderedDict
+
+CAPTURE = -1_000_000
+EXACT, LOWER, UPPER = 0, 1, 2
+# Look at the clock every NODE_CHECK + 1 nodes: a node costs a few microseconds, a clock read well under one
+NODE_CHECK = 15
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class ExpertThief:
+    """Lookahead thief for the Expert difficulty.
+
+    Searches the chase as a two-player game over (thief, police) cells: the
+    thief moves, then the police replies, each stepping to an open neighbour
+    or staying put. Leaves are scored by the true path distance between them
+    (out to a fixed radius) plus the thief's number of exits, so dead ends
+    look as bad as they are. Alpha-beta with iterative deepening keeps the
+    move from the deepest finished depth, so stopping at ``budget`` seconds
+    always leaves an answer. ``node_budget`` replaces the clock with a node
+    count when the choice has to be reproducible; the transposition table
+    then lives for one choice, so a choice depends only on the two positions
+    and the grid, never on earlier moves. Under the clock, where choices
+    depend on timing anyway, the table is kept to search deeper.
+    """
+
+    def __init__(self, pathfinder, budget=0.004, node_budget=None, max_depth=12, table_size=200_000, field_cache=256):
+        self.pf = pathfinder
+        self.budget = budget
+        self.node_budget = node_budget
+        self.max_depth = max_depth
+        self.table = OrderedDict()
+        self.table_size = table_size
+        self.fields = OrderedDict()
+        self.field_cache = field_cache
+        # Distance fields stop here; past it only the straight-line gap matters to a short lookahead
+        self.radius = 2 * max_depth + 8
+        self.deadline = 0.0
+        self.nodes = 0
+        self.depth_reached = 0
+
+    def clear(self):
+        # Distance fields are only valid for the grid they were built on
+        self.table.clear()
+        self.fields.clear()
+
+    def _moves(self, i):
+        passable = self.pf.passable
+        return [i] + [i + off for off in self.pf.offsets if passable[i + off]]
+
+    def _field(self, police):
+        field = self.fields.get(police)
+        if field is not None:
+            self.fields.move_to_end(police)
+            return field
+        # Bounded BFS: anything farther than the search can matter is just "far"
+        passable, offsets, radius = self.pf.passable, self.pf.offsets, self.radius
+        timed = self.node_budget is None
+        field = {police: 0}
+        frontier = [police]
+        for d in range(1, radius + 1):
+            # A field can cost more than many nodes, so it answers to the clock too
+            if timed and time.perf_counter() > self.deadline:
+                raise SearchTimeout
+            nxt = []
+            for i in frontier:
+                for off in offsets:
+                    j = i + off
+                    if passable[j] and j not in field:
+                        field[j] = d
+                        nxt.append(j)
+            frontier = nxt
+        self.fields[police] = field
+        if len(self.fields) > self.field_cache:
+            self.fields.popitem(last=False)
+        return field
+
+    def _evaluate(self, thief, police):
+        distance = self._field(police).get(thief)
+        if distance is None:
+            pf = self.pf
+            (tx, ty), (px, py) = pf.cell(thief), pf.cell(police)
+            distance = self.radius + abs(tx - px) + abs(ty - py)
+        return distance * 10 + len(self._moves(thief))
+
+    def _store(self, key, value):
+        self.table[key] = value
+        self.table.move_to_end(key)
+        if len(self.table) > self.table_size:
+            self.table.popitem(last=False)
+
+    def _search(self, thief, police, depth, alpha, beta, thief_to_move, ply):
+        if thief == police:
+            return CAPTURE + ply
+        if depth == 0:
+            return self._evaluate(thief, police)
+        self.nodes += 1
+        if self.node_budget is not None:
+            if self.nodes > self.node_budget:
+                raise SearchTimeout
+        elif not self.nodes & NODE_CHECK and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+        key = (thief, police, thief_to_move)
+        entry = self.table.get(key)
+        best_move = None
+        if entry is not None:
+            entry_depth, flag, value, best_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT or (flag == LOWER and value >= beta) or (flag == UPPER and value <= alpha):
+                    return value
+
+        mover = thief if thief_to_move else police
+        moves = self._moves(mover)
+        if best_move in moves:
+            moves.remove(best_move)
+            moves.insert(0, best_move)
+
+        original_alpha, original_beta = alpha, beta
+        if thief_to_move:
+            value = CAPTURE * 2
+            for move in moves:
+                score = self._search(move, police, depth - 1, alpha, beta, False, ply + 1)
+                if score > value:
+                    value, best_move = score, move
+                alpha = max(alpha, value)
+                if alpha >= beta:
+                    break
+        else:
+            value = -CAPTURE * 2
+            for move in moves:
+                score = self._search(thief, move, depth - 1, alpha, beta, True, ply + 1)
+                if score < value:
+                    value, best_move = score, move
+                beta = min(beta, value)
+                if alpha >= beta:
+                    break
+
+        if value <= original_alpha:
+            flag = UPPER
+        elif value >= original_beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(key, (depth, flag, value, best_move))
+        return value
+
+    def choose(self, thief_pos, police_pos):
+        """Best thief cell found within the budget (may be thief_pos itself)."""
+        pf = self.pf
+        thief, police = pf.index(*thief_pos), pf.index(*police_pos)
+        if self.node_budget is not None:
+            self.table.clear()
+        self.deadline = time.perf_counter() + self.budget
+        self.nodes = 0
+        self.depth_reached = 0
+        best = thief
+        # One thief move plus one police reply per depth step
+        for plies in range(2, 2 * self.max_depth + 1, 2):
+            try:
+                value = self._search(thief, police, plies, CAPTURE * 2, -CAPTURE * 2, True, 0)
+            except SearchTimeout:
+                break
+            entry = self.table.get((thief, police, True))
+            if entry is not None and entry[3] is not None:
+                best = entry[3]
+            self.depth_reached = plies // 2
+            if value <= CAPTURE + plies or value >= -CAPTURE - plies:
+                break
+        return pf.cell(best)
@@ -0,0 +1,191 @@
+"""Play many seeded auto-mode games per difficulty across all cores and report the results.
+
+    python tournament.py                              # 200 games per difficulty
+    python tournament.py --games 1000 --difficulties Hard Expert --workers 16
+    python tournament.py --time-limit 45 --out report.json
+    python tournament.py --pickups boost=0.01 time=0.01 bonus=0.03 --respawn 5
+
+Each game is independent (its own seed and SimState), so games are spread
+over a process pool in chunks and only a few numbers per game travel back.
+Seeds run from --first-seed, so a report is reproducible game for game;
+--expert-nodes swaps the Expert thief's clock budget for a node budget so
+Expert games are too.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+import numpy as np
+
+import simulation
+from pickups import PICKUP_KINDS
+from simulation import DEFAULT_PICKUPS, DIFFICULTIES, POLICE_PLANNERS, SimState, next_event_dt, step
+
+CAPTURE_BINS = 6
+
+# Set per worker process by _init_worker
+expert_nodes = None
+police_planner = "field"
+pickups = DEFAULT_PICKUPS
+pickup_respawn = None
+
+
+class LatencyRecorder:
+    """Stands in for the frame profiler on a SimState and keeps every AI stage duration."""
+
+    def __init__(self, stages=("thief_ai", "police_ai")):
+        self.samples = {name: [] for name in stages}
+        self.timers = {name: _Timer(samples) for name, samples in self.samples.items()}
+
+    def stage(self, name):
+        return self.timers[name]
+
+
+class _Timer:
+    __slots__ = ("samples", "start")
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+def _init_worker(time_limit, nodes, planner, spec, respawn):
+    global expert_nodes, police_planner, pickups, pickup_respawn
+    if time_limit is not None:
+        simulation.LEVEL_TIME_LIMIT = time_limit
+    expert_nodes = nodes
+    police_planner = planner
+    pickups = spec
+    pickup_respawn = respawn
+
+
+def pickup_arg(text):
+    # kind=amount: an int is a count per grid, a float a share of the road cells
+    kind, _, amount = text.partition("=")
+    if kind not in PICKUP_KINDS:
+        raise argparse.ArgumentTypeError(f"unknown pickup {kind!r}, expected one of {', '.join(PICKUP_KINDS)}")
+    try:
+        return kind, float(amount) if "." in amount else int(amount)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad amount in {text!r}") from None
+
+
+def play(task):
+    difficulty, seed = task
+    state = SimState(difficulty, seed, pickups=pickups)
+    state.expert.node_budget = expert_nodes
+    state.police_planner = police_planner
+    state.pickup_respawn = pickup_respawn
+    recorder = LatencyRecorder()
+    state.profiler = recorder
+    while not state.outcome:
+        step(state, None, next_event_dt(state))
+    return (
+        difficulty,
+        state.outcome == "caught",
+        state.clock,
+        state.grid_resets,
+        state.moves,
+        np.asarray(recorder.samples["thief_ai"], np.float32),
+        np.asarray(recorder.samples["police_ai"], np.float32),
+    )
+
+
+def _latency(chunks):
+    samples = np.concatenate(chunks) * 1000
+    if not len(samples):
+        samples = np.zeros(1)
+    p50, p99 = np.percentile(samples, (50, 99))
+    return {"mean_ms": float(samples.mean()), "p50_ms": float(p50), "p99_ms": float(p99), "max_ms": float(samples.max())}
+
+
+def summarize(results, time_limit):
+    report = {}
+    for difficulty in sorted({r[0] for r in results}, key=DIFFICULTIES.index):
+        games = [r for r in results if r[0] == difficulty]
+        captures = np.array([r[2] for r in games if r[1]])
+        resets = np.array([r[3] for r in games])
+        bins = np.linspace(0, time_limit, CAPTURE_BINS + 1)
+        entry = {
+            "games": len(games),
+            "catch_rate": len(captures) / len(games),
+            "moves_mean": float(np.mean([r[4] for r in games])),
+            "grid_resets_mean": float(resets.mean()),
+            "grid_resets_max": int(resets.max()),
+            "capture_histogram": {
+                f"{lo:g}-{hi:g}s": int(count) for lo, hi, count in zip(bins, bins[1:], np.histogram(captures, bins)[0])
+            },
+            "thief_ai": _latency([r[5] for r in games]),
+            "police_ai": _latency([r[6] for r in games]),
+        }
+        if len(captures):
+            p10, p50, p90 = np.percentile(captures, (10, 50, 90))
+            entry["capture_time"] = {"mean_s": float(captures.mean()), "p10_s": float(p10), "p50_s": float(p50), "p90_s": float(p90)}
+        report[difficulty] = entry
+    return report
+
+
+def print_report(report):
+    print(f"{'difficulty':<10} {'games':>6} {'caught':>7} {'t_p50':>7} {'t_p90':>7} {'resets':>7} "
+          f"{'thief_p50':>10} {'thief_p99':>10} {'police_p50':>11} {'police_p99':>11}")
+    for difficulty, entry in report.items():
+        capture = entry.get("capture_time")
+        p50, p90 = (f"{capture['p50_s']:.1f}s", f"{capture['p90_s']:.1f}s") if capture else ("-", "-")
+        print(f"{difficulty:<10} {entry['games']:>6} {entry['catch_rate']:>7.1%} {p50:>7} {p90:>7} "
+              f"{entry['grid_resets_mean']:>7.2f} "
+              f"{entry['thief_ai']['p50_ms']:>8.3f}ms {entry['thief_ai']['p99_ms']:>8.3f}ms "
+              f"{entry['police_ai']['p50_ms']:>9.3f}ms {entry['police_ai']['p99_ms']:>9.3f}ms")
+    for difficulty, entry in report.items():
+        histogram = " ".join(f"{span}:{count}" for span, count in entry["capture_histogram"].items())
+        print(f"{difficulty:<10} captures {histogram}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=200, help="games per difficulty (default 200)")
+    parser.add_argument("--difficulties", nargs="+", choices=DIFFICULTIES, default=list(DIFFICULTIES))
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes (default: all cores)")
+    parser.add_argument("--time-limit", type=float, help="override LEVEL_TIME_LIMIT in seconds")
+    parser.add_argument("--expert-nodes", type=int, help="node budget for the Expert search instead of its time budget")
+    parser.add_argument("--police-planner", choices=POLICE_PLANNERS, default="field")
+    parser.add_argument("--pickups", nargs="+", type=pickup_arg, metavar="KIND=AMOUNT",
+                        help="items per grid, e.g. boost=3 bonus=0.02 (default boost=3)")
+    parser.add_argument("--respawn", type=float, help="seconds until a taken pickup reappears (default: never)")
+    parser.add_argument("--out", help="write the report JSON here")
+    args = parser.parse_args(argv)
+
+    tasks = [(difficulty, args.first_seed + i) for difficulty in args.difficulties for i in range(args.games)]
+    # Interleave difficulties so slow Expert games don't all land at the end of the queue
+    tasks.sort(key=lambda task: task[1])
+    workers = max(1, args.workers)
+    chunksize = max(1, len(tasks) // (workers * 8))
+    start = time.perf_counter()
+    spec = dict(args.pickups) if args.pickups else DEFAULT_PICKUPS
+    with Pool(workers, _init_worker, (args.time_limit, args.expert_nodes, args.police_planner, spec, args.respawn)) as pool:
+        results = list(pool.imap_unordered(play, tasks, chunksize))
+    wall = time.perf_counter() - start
+
+    time_limit = args.time_limit if args.time_limit is not None else simulation.LEVEL_TIME_LIMIT
+    report = summarize(results, time_limit)
+    print_report(report)
+    print(f"{len(tasks)} games on {workers} workers in {wall:.2f}s ({len(tasks) / wall:.1f} games/s)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"workers": workers, "wall_s": wall, "time_limit": time_limit, "difficulties": report}, f, indent=1)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())